@@ -0,0 +1,18 @@
+"""
+benchmarks measuring how the stages of manual page generation scale
+
+Each module of this package measures one stage. Its function run generates
+results, which are dictionaries holding the name of the benchmark, its parameters
+and the best time measured in seconds. Run the whole suite from the top of the
+repository with "python -m benchmarks" to get all results as a JSON document.
+"""
+
+from timeit import repeat
+
+def best(function, repetitions=5):
+    """the shortest time in seconds one of several calls to a function took"""
+    return min(repeat(function, number=1, repeat=repetitions))
+
+def result(name, seconds, **parameters):
+    """Compose the result of a single benchmark."""
+    return dict(name=name, parameters=parameters, seconds=seconds)
@@ -0,0 +1,28 @@
+"""
+Run the benchmarks of the manpager, printing their results as JSON.
+"""
+
+from argparse import ArgumentParser, FileType
+from importlib import import_module
+from json import dump
+from platform import python_implementation, python_version
+from subprocess import run, PIPE, DEVNULL
+from .process import repository
+
+stages = ('formatting', 'process', 'build')
+
+parser = ArgumentParser(prog='python -m benchmarks', description=__doc__)
+parser.add_argument('-s', '--stage', action='append', choices=stages, dest='stages',
+        help="a stage to measure, may be repeated, by default all are")
+parser.add_argument('-o', '--output', type=FileType('w'), default='-',
+        help="file to write the results to, by default the standard output")
+args = parser.parse_args()
+
+commit = run(['git', 'rev-parse', 'HEAD'], cwd=repository,
+        stdout=PIPE, stderr=DEVNULL, universal_newlines=True).stdout.strip()
+dump(dict(commit=commit or None, python='{} {}'.format(
+        python_implementation(), python_version()), results=[
+            measurement for stage in args.stages or stages
+            for measurement in import_module('.' + stage, __package__).run()]),
+    args.output, indent=2)
+args.output.write('\n')
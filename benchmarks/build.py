@@ -0,0 +1,69 @@
+"""
+time waf builds of a synthetic package with many executable modules
+
+Waf is looked up in the environment variable WAF, or on the PATH otherwise.
+Without it, these benchmarks are skipped. Every module gets an entrypynt
+starter and a manual page. Clean builds start out with an empty manpager cache,
+cached ones reuse the pages of the previous build, and a no-op build finds
+everything up to date.
+"""
+
+from os import environ, makedirs, path
+from shutil import which
+from subprocess import run as execute, DEVNULL
+from tempfile import TemporaryDirectory
+from itertools import count as counter
+import sys
+from . import best, result
+from .process import repository, module
+
+wscript = """
+from sys import path
+path.append({!r})
+
+def options(ctx):
+    ctx.load('manpyger')
+
+def configure(ctx):
+    ctx.load('manpyger')
+    ctx.check_python_version()
+
+def build(ctx):
+    ctx(features="py entrypynt", root="synthetic", batch={!r})
+"""
+
+def package(directory, modules, batch):
+    """Write a project with a package holding some executable modules to a directory."""
+    with open(path.join(directory, 'wscript'), 'w') as script:
+        script.write(wscript.format(path.join(repository, 'waftools'), batch))
+    makedirs(path.join(directory, 'synthetic'))
+    open(path.join(directory, 'synthetic', '__init__.py'), 'w').close()
+    for number in range(modules):
+        with open(path.join(directory, 'synthetic', 'tool{}.py'.format(number)), 'w') as source:
+            source.write("if __name__ == '__main__':\n    ")
+            source.write(module(10).replace("\n", "\n    "))
+
+def run(modules=200):
+    waf = environ.get('WAF') or which('waf')
+    if not waf:
+        print("waf not found, skipping build benchmarks", file=sys.stderr)
+        return
+    for batch in False, True:
+        with TemporaryDirectory() as directory:
+            package(directory, modules, batch)
+            caches = counter()
+            env = dict(environ, PYTHONPATH=repository)
+            def waf_run(*commands, cache=None):
+                env['MANPAGER_CACHE'] = path.join(directory, 'cache{}'.format(
+                    next(caches) if cache is None else cache))
+                execute([waf] + list(commands), cwd=directory, env=env,
+                        stdout=DEVNULL, check=True)
+            waf_run('configure', '--prefix', path.join(directory, 'install'))
+            yield result("build clean", best(lambda: waf_run('clean', 'build'), 3),
+                    modules=modules, batch=batch)
+            waf_run('build', cache='shared')
+            yield result("build cached", best(
+                lambda: waf_run('clean', 'build', cache='shared'), 3),
+                modules=modules, batch=batch)
+            yield result("build no-op", best(lambda: waf_run('build', cache='shared')),
+                    modules=modules, batch=batch)
@@ -0,0 +1,60 @@
+"""
+time how long formatting and serializing pages of synthetic parsers takes
+"""
+
+from io import StringIO
+from manpager.formatter import sanitize
+from . import best, result, parsers
+
+def usage(parser):
+    """Format the usage of a parser."""
+    formatter = parser._get_formatter()
+    formatter.add_usage(parser.usage, parser._actions, parser._mutually_exclusive_groups)
+
+def arguments(parser):
+    """Format the argument list of a parser."""
+    formatter = parser._get_formatter()
+    for group in parser._action_groups:
+        formatter.start_section(group.title)
+        formatter.add_arguments(group._group_actions)
+        formatter.end_section()
+
+def page(parser):
+    """Format the complete page of a parser."""
+    parser.format_help()
+
+def compose(parser):
+    """Format the page of a parser, returning it as ManPage instead of a string."""
+    formatter = parser._get_formatter()
+    parser._get_formatter = lambda: formatter
+    try:
+        parser.format_help()
+    finally:
+        del parser._get_formatter
+    return formatter.sect
+
+def run():
+    for count in 10, 100, 1000, 10000:
+        parser = parsers.flat(count)
+        yield result("render flat", best(lambda: page(parser)), options=count)
+    parser = parsers.flat(5000)
+    for stage in usage, arguments:
+        yield result(stage.__name__ + " flat", best(lambda: stage(parser)), options=5000)
+    for groups in 10, 100, 1000:
+        parser = parsers.grouped(groups, 10)
+        yield result("render grouped", best(lambda: page(parser)), groups=groups, width=10)
+    for depth in 1, 2, 3:
+        parser = parsers.tree(depth, 5)
+        everything = [parser] + list(parsers.subparsers(parser))
+        yield result("render tree", best(lambda: [page(each) for each in everything]),
+                depth=depth, breadth=5, parsers=len(everything))
+    for paragraphs in 10, 100, 1000:
+        text = parsers.text(paragraphs)
+        yield result("sanitize", best(lambda: sanitize(text)), paragraphs=paragraphs)
+    parser = parsers.verbose(100, 10)
+    yield result("render verbose", best(lambda: page(parser)), options=100, paragraphs=10)
+    for count in 1000, 10000:
+        manpage = compose(parsers.flat(count))
+        yield result("serialize string", best(lambda: str(manpage)), options=count)
+        yield result("serialize stream", best(lambda: manpage.write(StringIO())),
+                options=count)
@@ -0,0 +1,73 @@
+"""
+synthetic argument parsers of configurable size and shape
+"""
+
+from argparse import ArgumentParser
+from manpager.formatter import ManPageFormatter
+
+def parser(prog='benchmark'):
+    """Create an empty parser formatting its help as manual page."""
+    return ArgumentParser(prog=prog, formatter_class=ManPageFormatter)
+
+def flat(count):
+    """Create a parser with count options, every tenth of them mutually exclusive."""
+    result = parser()
+    exclusive = result.add_mutually_exclusive_group()
+    for number in range(count):
+        (exclusive if number % 10 == 0 else result).add_argument(
+                '-o{}'.format(number), '--option-{}'.format(number),
+                help="option number {}".format(number))
+    result.add_argument('files', nargs='*', help="files to process")
+    return result
+
+def grouped(count, width):
+    """Create a parser with count argument groups of width options each,
+    half of which are also part of a mutually exclusive group."""
+    result = parser()
+    for number in range(count):
+        group = result.add_argument_group("group {}".format(number))
+        exclusive = group.add_mutually_exclusive_group()
+        for option in range(width):
+            (exclusive if option % 2 else group).add_argument(
+                    '--group-{}-option-{}'.format(number, option), metavar='VALUE',
+                    help="option {} in group {}".format(option, number))
+    return result
+
+def tree(depth, breadth, options=5):
+    """Create a parser with breadth subcommands on each of depth levels, each having
+    some options. The prog of all parsers is given explicitly, as computing it from
+    the usage of the parent would format it as a complete page."""
+    def populate(current, prog, level):
+        for number in range(options):
+            current.add_argument('--option-{}'.format(number),
+                    help="option {} of {}".format(number, prog))
+        if level < depth:
+            commands = current.add_subparsers(prog=prog)
+            for number in range(breadth):
+                name = 'command{}'.format(number)
+                populate(commands.add_parser(name, prog=prog + ' ' + name,
+                    help="subcommand {} of {}".format(number, prog)), prog + ' ' + name,
+                    level + 1)
+    result = parser()
+    populate(result, result.prog, 0)
+    return result
+
+def subparsers(parser):
+    """Generate all parsers of subcommands below a parser, recursively."""
+    for action in parser._subparsers._group_actions if parser._subparsers else ():
+        for subparser in action.choices.values():
+            yield subparser
+            yield from subparsers(subparser)
+
+def text(paragraphs, sentences=8):
+    """Compose a long help text, full of hyphens and irregular whitespace."""
+    sentence = "The  --long-option   takes a comma-separated list of\n   well-known values. "
+    return "\n\n\n".join(sentence * sentences for paragraph in range(paragraphs))
+
+def verbose(count, paragraphs):
+    """Create a parser with count options having a help text with many paragraphs."""
+    result = parser()
+    result.description = text(paragraphs)
+    for number in range(count):
+        result.add_argument('--option-{}'.format(number), help=text(paragraphs))
+    return result
@@ -0,0 +1,38 @@
+"""
+time complete manpager processes documenting a synthetic module
+
+Cold runs generate the page without a cache, warm runs find it in a cache
+filled beforehand. The startup of a bare interpreter is measured for reference.
+"""
+
+from os import environ, path
+from subprocess import run as execute, DEVNULL
+from tempfile import TemporaryDirectory
+import sys
+from . import best, result
+
+repository = path.dirname(path.dirname(path.abspath(__file__)))
+
+def module(count):
+    """the source of an executable module with count options"""
+    return "\n".join(["from argparse import ArgumentParser",
+        "parser = ArgumentParser(description='a synthetic program')"] + [
+            "parser.add_argument('--option-{0}', help='option number {0}')".format(number)
+            for number in range(count)] + ["parser.parse_args()", ""])
+
+def run():
+    with TemporaryDirectory() as directory:
+        env = dict(environ, MANPAGER_CACHE=path.join(directory, 'cache'),
+                PYTHONPATH=':'.join((repository, directory)))
+        def manpager(*arguments):
+            execute([sys.executable, '-Bm', 'manpager'] + list(arguments),
+                    env=env, stdout=DEVNULL, check=True)
+        yield result("interpreter startup", best(lambda: execute([sys.executable, '-c', ''])))
+        for count in 10, 1000:
+            name = 'synthetic{}'.format(count)
+            with open(path.join(directory, name + '.py'), 'w') as source:
+                source.write(module(count))
+            yield result("process cold", best(lambda: manpager('--no-cache', name)),
+                    options=count)
+            manpager(name)
+            yield result("process warm", best(lambda: manpager(name)), options=count)
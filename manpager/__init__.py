@@ -0,0 +1,14 @@
+"""
+generation of manual pages from the help texts of argparse
+
+Run this package as a program to document executable modules, or call render
+to compose the page of an ArgumentParser or a module from within python.
+"""
+
+def __getattr__(name):
+    """Load the generator only when its interface is first used, as
+    this is not needed for, but slows down all other invocations."""
+    if name in ('render', 'NoPage'):
+        from . import generate
+        return getattr(generate, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,211 @@
+"""
+serialization of manual pages to formats other than roff
+
+The sections of a page are composed of the small subset of roff the formatter emits: running
+text with font escapes and paragraph macros. Backends read this back as a format neutral
+sequence of blocks, paragraphs and definitions of terms, to render them in their own format.
+Additional sections given by users may use a few more macros, of which the font alternating
+ones are understood as well. All others are reduced to their text.
+
+A backend is a function writing a page to a stream, registered with the suffix of the files
+it produces in the dictionary backends, which may be extended to support further formats.
+"""
+
+from collections import namedtuple, OrderedDict
+from html import escape as html_escape
+from json import dump
+from re import compile
+from .structure import Container
+
+Backend = namedtuple('Backend', 'suffix write')
+
+Paragraph = namedtuple('Paragraph', 'text')
+Definition = namedtuple('Definition', 'term paragraphs')
+
+# escapes changing fonts or denoting special characters, the latter mapped to their text
+inline = compile(r'\\(f[BIRP]|\(..|.)')
+characters = {'-': '-', 'e': '\\', '\\': '\\', ' ': ' ', '~': ' ', '&': '', '|': '', '^': '',
+        '(em': '\u2014', '(en': '\u2013', '(bu': '\u2022', '(co': '\u00a9'}
+
+def spans(text):
+    """Split running text into pairs of font, one of B, I and R, and plain text."""
+    font, pieces, result = 'R', [], []
+    def flush():
+        if pieces:
+            if result and result[-1][0] == font:
+                result[-1] = font, result[-1][1] + ''.join(pieces)
+            else:
+                result.append((font, ''.join(pieces)))
+            pieces.clear()
+    position = 0
+    for match in inline.finditer(text):
+        pieces.append(text[position:match.start()])
+        position = match.end()
+        escape = match.group(1)
+        if escape[0] == 'f' and len(escape) == 2:
+            flush()
+            font = 'R' if escape[1] == 'P' else escape[1]
+        else:
+            pieces.append(characters.get(escape, ''))
+    pieces.append(text[position:])
+    flush()
+    return result
+
+def plain(text):
+    """Strip running text of all markup."""
+    return ''.join(piece for font, piece in spans(text))
+
+arguments = compile(r'"((?:[^"]|"")*)"|((?:\\.|\S)+)')
+
+def request(name, line):
+    """Convert a line calling a macro to running text, or None when it structures the text."""
+    words = [quoted.replace('""', '"') if quoted else word
+            for quoted, word in arguments.findall(line)]
+    if name in ('B', 'I'):
+        return '\\f{}{}\\fR'.format(name, ' '.join(words))
+    if len(name) == 2 and set(name) <= set('BIR') and name[0] != name[1]:
+        return ''.join('\\f{}{}'.format(name[index % 2], word)
+                for index, word in enumerate(words)) + '\\fR'
+    return ' '.join(words) or None
+
+def lines(container):
+    """Generate the lines of the text of a container, leaving out its
+    title, and the subsections found between them as they are."""
+    for element in container[1:]:
+        if isinstance(element, Container):
+            yield element
+        else:
+            yield from str(element).split('\n')
+
+def blocks(container):
+    """Generate the text of a container as Paragraph and Definition blocks,
+    as well as its subsections at the position they appear in."""
+    paragraph, definition, term = [], None, False
+    def flush():
+        if paragraph:
+            text = ' '.join(paragraph)
+            paragraph.clear()
+            if definition:
+                definition.paragraphs.append(text)
+            else:
+                return Paragraph(text)
+    for line in lines(container):
+        if isinstance(line, Container):
+            block = flush()
+            if block:
+                yield block
+            if definition:
+                yield definition
+            definition = None
+            yield line
+        elif line.startswith('.') or line.startswith("'"):
+            name, _, rest = line[1:].partition(' ')
+            if name in ('PP', 'LP', 'P', 'TP', 'IP', 'SS', 'SH', 'br', 'sp'):
+                block = flush()
+                if block:
+                    yield block
+                if name in ('PP', 'LP', 'P', 'TP', 'SS', 'SH') and definition:
+                    yield definition
+                    definition = None
+                if name == 'TP':
+                    term = True
+            else:
+                text = request(name, rest)
+                if text is not None:
+                    paragraph.append(text)
+        elif term:
+            definition, term = Definition(line, []), False
+        elif line.strip():
+            paragraph.append(line)
+    block = flush()
+    if block:
+        yield block
+    if definition:
+        yield definition
+
+def roff(page, stream):
+    """Write a page as roff, the native format of manual pages."""
+    page.write(stream)
+
+def html(page, stream):
+    """Write a page as a standalone HTML document."""
+    tags = {'B': '<b>{}</b>', 'I': '<i>{}</i>', 'R': '{}'}
+    def text(roff):
+        return ''.join(tags[font].format(html_escape(piece)) for font, piece in spans(roff))
+    def section(container, level):
+        stream.write('<h{0}>{1}</h{0}>\n'.format(level, html_escape(plain(container.title))))
+        listing = False
+        for block in blocks(container):
+            if listing and not isinstance(block, Definition):
+                stream.write('</dl>\n')
+                listing = False
+            if isinstance(block, Container):
+                section(block, level + 1)
+            elif isinstance(block, Paragraph):
+                stream.write('<p>{}</p>\n'.format(text(block.text)))
+            else:
+                if not listing:
+                    stream.write('<dl>\n')
+                    listing = True
+                stream.write('<dt>{}</dt>\n<dd>{}</dd>\n'.format(text(block.term),
+                    ''.join('<p>{}</p>'.format(text(paragraph))
+                        for paragraph in block.paragraphs)))
+        if listing:
+            stream.write('</dl>\n')
+    title = html_escape(plain(page.title))
+    stream.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            '<title>{0}(1)</title>\n</head>\n<body>\n<h1>{0}(1)</h1>\n'.format(title))
+    for element in page[1:]:
+        if element:
+            section(element, 2)
+    stream.write('<footer>{}</footer>\n</body>\n</html>\n'.format(page.date.isoformat()))
+
+markdown_special = compile(r'([\\`*_\[\]<>#|])')
+
+def markdown(page, stream):
+    """Write a page as Markdown."""
+    marks = {'B': '**', 'I': '*', 'R': ''}
+    def text(roff):
+        return ''.join(marks[font] + markdown_special.sub(r'\\\1', piece) + marks[font]
+                if piece.strip() else piece for font, piece in spans(roff))
+    def section(container, level):
+        stream.write('\n{} {}\n'.format('#' * level, plain(container.title)))
+        for block in blocks(container):
+            if isinstance(block, Container):
+                section(block, level + 1)
+            elif isinstance(block, Paragraph):
+                stream.write('\n{}\n'.format(text(block.text)))
+            else:
+                stream.write('\n- {}\n'.format(text(block.term)))
+                for paragraph in block.paragraphs:
+                    stream.write('\n  {}\n'.format(text(paragraph)))
+    stream.write('# {}(1)\n'.format(plain(page.title)))
+    for element in page[1:]:
+        if element:
+            section(element, 2)
+
+def json(page, stream):
+    """Write a page as JSON, holding the plain text of its sections."""
+    def section(container):
+        content, subsections = [], []
+        for block in blocks(container):
+            if isinstance(block, Container):
+                subsections.append(section(block))
+            elif isinstance(block, Paragraph):
+                content.append(plain(block.text))
+            else:
+                content.append(dict(term=plain(block.term),
+                    description=[plain(paragraph) for paragraph in block.paragraphs]))
+        result = OrderedDict(title=plain(container.title), content=content)
+        if subsections:
+            result['subsections'] = subsections
+        return result
+    dump(OrderedDict(title=plain(page.title), section=1, date=page.date.isoformat(),
+        sections=[section(element) for element in page[1:] if element]), stream, indent=2)
+    stream.write('\n')
+
+backends = OrderedDict((
+    ('roff', Backend('.1', roff)),
+    ('html', Backend('.html', html)),
+    ('md', Backend('.md', markdown)),
+    ('json', Backend('.json', json))))
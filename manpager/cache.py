@@ -0,0 +1,181 @@
+"""
+content addressed storage of generated manual pages
+
+A manual page only depends on the sources of the module documented and its local imports,
+the versions of python and of the distributions it imports, the manpager itself and the
+options given, including the date of the page. Hashing all of these yields a key under which
+the page can be stored to be reused without executing the module again. The cache directory
+is bounded in size by evicting the least recently used pages, which are tracked by the
+modification time of their files, updated whenever a page is reused. Pages are stored in 256
+buckets by the first two digits of their keys, over which they spread evenly, so that the size
+of the whole cache can be estimated from a few of them. Only when this exceeds the limit, the
+cache is pruned, by a quarter of the limit, to not go through all pages again right after.
+A cache that cannot be read or written is reported once and then left alone, generating
+pages as if it was disabled.
+"""
+
+from hashlib import sha256
+from os import environ, makedirs, replace, scandir, unlink, utime, getpid, path
+from sys import stderr, version as python_version
+from .imports import closure, versions
+
+# Increment when the layout of keys or entries changes.
+FORMAT = 2
+
+def default_directory():
+    """the cache directory used when none is given explicitly"""
+    return environ.get('MANPAGER_CACHE') or path.join(
+            environ.get('XDG_CACHE_HOME') or path.expanduser('~/.cache'), 'manpager')
+
+def own_sources():
+    """the paths to the sources of the manpager itself"""
+    directory = path.dirname(__file__)
+    return sorted(entry.path for entry in scandir(directory) if entry.name.endswith('.py'))
+
+class Cache(object):
+    """A directory of pages, stored in files named by their keys."""
+
+    def __init__(self, directory, limit):
+        """Use a directory, not letting its contents grow larger than limit bytes."""
+        self.directory = directory
+        self.limit = limit
+        self.broken = False
+
+    def unusable(self, error):
+        """Give up on the cache after an error, reporting only the first one."""
+        if not self.broken:
+            print("cache not used: {}".format(error), file=stderr)
+        self.broken = True
+
+    def key(self, options):
+        """Compute the key of a page from the options it is generated with."""
+        local, external = closure(options.module)
+        digest = sha256(repr((FORMAT, python_version, str(options.date), options.module,
+            options.program, options.short, options.suite, options.static,
+            list(options.extra))).encode())
+        for name, source in sorted(local.items()) + [
+                (None, source) for source in own_sources()]:
+            digest.update(repr(name).encode())
+            with open(source, 'rb') as file:
+                digest.update(sha256(file.read()).digest())
+        if external:
+            for distribution in versions(external):
+                digest.update(repr(distribution).encode())
+        return digest.hexdigest()
+
+    def entry(self, key):
+        """the path to the file storing a page"""
+        return path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return the page stored under a key, or None if absent, marking it used."""
+        if self.broken:
+            return None
+        entry = self.entry(key)
+        try:
+            with open(entry) as file:
+                page = file.read()
+            utime(entry)
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            self.unusable(error)
+            return None
+        return page
+
+    def put(self, key, page):
+        """Store a page, evicting others as needed to stay within the size limit."""
+        if self.broken:
+            return
+        entry = self.entry(key)
+        temporary = '{}.{}.tmp'.format(entry, getpid())
+        try:
+            makedirs(path.dirname(entry), exist_ok=True)
+            with open(temporary, 'w') as file:
+                file.write(page)
+            replace(temporary, entry)
+        except OSError as error:
+            self.unusable(error)
+            try:
+                unlink(temporary)
+            except OSError:
+                pass
+            return
+        if self.estimate(key) > self.limit:
+            self.prune(self.limit * 3 // 4)
+
+    def estimate(self, key, samples=4):
+        """Estimate the size of all pages stored from a number of buckets, starting
+        with the one a key falls into, to which new pages are added first."""
+        first = int(key[:2], 16)
+        size = 0
+        for bucket in range(first, first + samples):
+            try:
+                entries = list(scandir(path.join(self.directory, '{:02x}'.format(bucket % 256))))
+            except FileNotFoundError:
+                continue
+            except OSError as error:
+                self.unusable(error)
+                return 0
+            size += sum(entry.stat().st_size for entry in entries
+                    if not entry.name.endswith('.tmp'))
+        return size * 256 // samples
+
+    def entries(self):
+        """Generate the DirEntry of each page stored."""
+        try:
+            buckets = list(scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for bucket in buckets:
+            if bucket.is_dir():
+                for entry in scandir(bucket.path):
+                    if not entry.name.endswith('.tmp'):
+                        yield entry
+
+    def stats(self):
+        """Count the pages stored and their total size in bytes."""
+        sizes = [entry.stat().st_size for entry in self.entries()]
+        return len(sizes), sum(sizes)
+
+    def prune(self, limit=None):
+        """Evict the least recently used pages until at most limit bytes
+        are occupied, by default the limit given on construction.
+        Returns the number of pages removed."""
+        limit = self.limit if limit is None else limit
+        try:
+            entries = sorted(((entry.stat(), entry.path) for entry in self.entries()),
+                    key=lambda entry: entry[0].st_mtime)
+        except OSError as error:
+            self.unusable(error)
+            return 0
+        size = sum(stat.st_size for stat, name in entries)
+        removed = 0
+        for stat, name in entries:
+            if size <= limit:
+                break
+            try:
+                unlink(name)
+            except FileNotFoundError:
+                pass
+            except OSError as error:
+                self.unusable(error)
+                break
+            size -= stat.st_size
+            removed += 1
+        return removed
+
+def open_cache(args):
+    """Create the cache configured on the command line, or None if it is disabled."""
+    if not args.no_cache:
+        return Cache(args.cache_dir, args.cache_size)
+
+def manage(args):
+    """Execute a cache management command as parsed from the command line."""
+    cache = Cache(args.cache_dir, args.cache_size)
+    if args.cache_command == 'stats':
+        count, size = cache.stats()
+        print("directory: {}\npages: {}\nsize: {}\nlimit: {}".format(
+            cache.directory, count, size, cache.limit))
+    elif args.cache_command == 'prune':
+        print("removed {} pages".format(cache.prune(args.max_size)))
@@ -5,10 +5,10 @@ The classes in this module rank around implementing a HelpFormatter
 that composes a man page instead of a console help text.
 """
 
-from argparse import HelpFormatter
+from argparse import HelpFormatter, SUPPRESS
 from functools import partial
-from .structure import TH, SH
-from .markup import bold, italic, listmap, FormatWrapper, Sanitizer
+from .structure import Container, TH, SH, SS
+from .markup import bold, italic, listmap, FormattedAction, Sanitizer
 
 sanitize = Sanitizer()
 sanitize_indented = Sanitizer('.IP')
@@ -18,27 +18,46 @@ class ManPage(TH):
     These TH will be initialized with a given set of default sections usually
     found in manual pages. Adding text will fill still empty sections, while
     the request to add a subsection will be redirected to an options subsection
-    instead. Empty sections will not be included in the string serialization.
+    instead. Empty sections will not be included in the serialization.
     """
 
-    def __init__(self, prog, suite=None, short_desc=None, extrasections={}):
+    __slots__ = ('short_desc', 'synopsis', 'description', 'options', 'next_section')
+
+    def __init__(self, prog, suite=None, short_desc=None, extrasections={}, commands={},
+            date=None):
         """Initializes the subsections NAME, SYNOPSIS, OPTIONS and REMARKS.
         prog -- program name to describe
         suite -- optional suite name to use in the header instead of prog
         short_desc -- optional short description to add in NAME
         extrasections -- an optional mapping from titles to contents
-            of additional sections to append at the end of the page"""
+            of additional sections to append at the end of the page
+        commands -- an optional mapping from names of subcommands to their own
+            pages, which will be summarized in a COMMANDS section
+        date -- optional date of the page, see TH"""
 
         name = SH('NAME') << prog
         synopsis = SH('SYNOPSIS')
         description = SH('DESCRIPTION')
         options = SH('OPTIONS')
+        summary = SH('COMMANDS')
         remarks = SH('REMARKS')
-        super().__init__(suite if suite else prog, name, synopsis, description, options, remarks,
-                *(SH(title) << sanitize(content) for title, content in extrasections.items()))
+        super().__init__(suite if suite else prog, name, synopsis, description, options,
+                summary, remarks,
+                *(SH(title) << sanitize(content) for title, content in extrasections.items()),
+                date=date)
         if short_desc:
             name << "\\-" << short_desc
-        self.options = options
+        self.short_desc = short_desc
+        self.synopsis, self.description, self.options = synopsis, description, options
+        for command, page in commands.items():
+            subsection = summary / command
+            subsection.extend(page.synopsis[1:])
+            for paragraph in (page.short_desc, ), page.description[1:]:
+                if any(paragraph):
+                    subsection << '.PP'
+                    subsection.extend(filter(None, paragraph))
+            for section in page.options[1:]:
+                subsection.extend(section[1:] if isinstance(section, SS) else (section, ))
         self.next_section = iter((synopsis, description, remarks)).__next__
 
     def __lshift__(self, text):
@@ -47,8 +66,13 @@ class ManPage(TH):
     def __truediv__(self, title):
         return self.options / title
 
-    def __str__(self):
-        return '\n'.join(str(item) for item in self if item)
+    def iter_lines(self):
+        for item in self:
+            if item:
+                if isinstance(item, Container):
+                    yield from item.iter_lines()
+                else:
+                    yield item
 
 class ManPageFormatter(HelpFormatter):
     """Help message formatter making the help text into a manual page.
@@ -57,17 +81,22 @@ class ManPageFormatter(HelpFormatter):
     and ArgumentParser explicitely stated not to be part of any documented API. Currently, it is
     only non-extensibly tested to work with python 3.4."""
 
-    def __init__(self, prog, *args, **kwargs):
+    def __init__(self, prog, *args, name=None, stream=None, **kwargs):
         """Remembers the program name and initializes the sect attribute to a fresh manpage.
 
-        Further arguments will be passed to the ManPage constructor. See there for more options.
+        The page itself is titled by name, which defaults to the program name. When a
+        stream is given, the page will be written to it line by line instead of being
+        returned as a whole by format_help. Further arguments will be passed to the
+        ManPage constructor. See there for more options.
         
         This class does by far not use all of the methods and attributes
         HelpFormatter does. The ones used only need the attribute _prog set.
         Not calling more complex parent methods or its constructor completely
         avoids the far detours HelpFormatter goes to consider the line width."""
         self._prog = bold(prog)
-        self.sect = ManPage(prog, *args, **kwargs)
+        self.stream = stream
+        self.views = {}
+        self.sect = ManPage(name or prog, *args, **kwargs)
 
     def start_section(self, heading):
         """Adds a new subsection to the current section stored in the sect attribute and
@@ -78,6 +107,14 @@ class ManPageFormatter(HelpFormatter):
         self.end_section = partial(reset, self.sect)
         self.sect /= heading
 
+    def view(self, action):
+        """the FormattedAction of an action, created once and reused by all sections"""
+        try:
+            return self.views[action]
+        except KeyError:
+            view = self.views[action] = FormattedAction(action)
+            return view
+
     def add_text(self, text):
         """Adds text element to the current section."""
         if text:
@@ -86,19 +123,26 @@ class ManPageFormatter(HelpFormatter):
     def add_usage(self, usage, actions, groups, prefix=None):
         """Formats the usage and appends it to the current section."""
         self.sect << self._prog \
-                << self._format_actions_usage(listmap(FormatWrapper, actions), groups)
+                << self._format_actions_usage(listmap(self.view, actions), groups)
 
     def add_arguments(self, actions):
-        """Formats arguments and appends it to the current section."""
+        """Formats arguments and appends it to the current section.
+        Arguments with suppressed help are left out, those without help are only listed."""
         for action in actions:
-            self.sect << '.TP' \
-                    << self._format_action_invocation(FormatWrapper(action)) \
-                    << sanitize_indented(self._expand_help(action))
+            if action.help is not SUPPRESS:
+                self.sect << '.TP' << self._format_action_invocation(self.view(action))
+                if action.help:
+                    self.sect << sanitize_indented(self._expand_help(action))
 
     def format_help(self):
         """Serializes the current section.
-        When the top level section is active, this returns the complete page as a string."""
-        return str(self.sect)
+        When the top level section is active, this returns the complete page as a string.
+        If a stream was given on construction, the section is written to it instead and
+        an empty string returned, which argparse does not print at all."""
+        if self.stream is None:
+            return str(self.sect)
+        self.sect.write(self.stream)
+        return ''
 
     def _get_default_metavar_for_optional(self, action):
         return italic(super()._get_default_metavar_for_optional(action))
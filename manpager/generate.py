@@ -0,0 +1,344 @@
+"""
+in-process generation of manual pages from executable modules
+
+Importing this module patches ArgumentParser, so that while a page is rendered, every parser
+asked to parse arguments prints a manual page instead of its help and exits. The page rendered
+is held in a context variable, so that rendering is confined to the context it was started in,
+and parsers used anywhere else, including other threads, behave as they always do.
+"""
+
+from argparse import ArgumentParser, Namespace, _SubParsersAction
+from functools import partial, partialmethod
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from contextvars import ContextVar
+from io import StringIO
+from itertools import chain
+from runpy import run_module
+from os import path, remove
+from sys import stdout, stderr
+import sys
+from threading import RLock
+from traceback import print_exc
+from .backends import backends
+from .formatter import ManPageFormatter
+from .static import extract, Unsupported
+from .structure import source_date, utc_date
+
+def override(cls, name, method):
+    """Injects a method into a class.
+
+    This will inject the given method into the given class, overriding a member
+    of the given name. The new method will receive the same arguments as the old
+    variant, with the original member passed in as second argument right after self.
+    If the class previously had no member of this name, this argument will be None.
+    """
+    setattr(cls, name, partialmethod(method, getattr(cls, name, None)))
+    return method
+
+def inject(cls):
+    """Decorate a method to be injected.
+
+    Using this decorator on a function will inject in as a method into
+    the given class, overriding an existing method with the same name.
+    """
+    return lambda method: override(cls, method.__name__, method)
+
+argparser = inject(ArgumentParser)
+
+# The options of the page currently rendered, as given to generate.
+page = ContextVar('page', default=None)
+
+@contextmanager
+def rendering(options):
+    """Document the parsers used within the context according to options."""
+    token = page.set(options)
+    try:
+        yield
+    finally:
+        page.reset(token)
+
+def subcommands(parser, prog, path=()):
+    """Generate the path of names leading to, program name, short description
+    and parser of every subcommand of a parser, recursing into their subcommands."""
+    for action in parser._actions:
+        if isinstance(action, _SubParsersAction):
+            helps = {choice.dest: choice.help for choice in action._choices_actions}
+            seen = set()
+            for name, subparser in action.choices.items():
+                if id(subparser) not in seen:  # Aliases map to the same parser.
+                    seen.add(id(subparser))
+                    subpath, subprog = path + (name, ), prog + ' ' + name
+                    yield subpath, subprog, helps.get(name), subparser
+                    yield from subcommands(subparser, subprog, subpath)
+
+def formatter(parser, prog, short=None, top=None, **kwargs):
+    """Create a formatter for the page of a parser, configured by the current page options.
+
+    The suite and additional sections are looked up on top,
+    the parser of the main program, which defaults to parser.
+    Further keyword arguments are passed on to ManPageFormatter."""
+    top = top or parser
+    options = page.get()
+    dated(options)
+    return ManPageFormatter(prog=prog,
+            short_desc=short or getattr(parser, 'short', None),
+            suite=options.suite or getattr(top, 'suite', None),
+            extrasections=OrderedDict(chain(
+                getattr(top, 'extrasections', {}).items(), options.extra)),
+            date=options.date, **kwargs)
+
+# The parser of the subcommand page currently composed, and the formatter composing it.
+composing = ContextVar('composing', default=(None, None))
+
+def compose_subpages(parser, options):
+    """Compose the pages of all subcommands of a parser into the subpages of options."""
+    prog = options.program or parser.prog
+    for path, subprog, short, subparser in subcommands(parser, prog):
+        sub = formatter(subparser, subprog, short, parser, name=subprog.replace(' ', '-'))
+        token = composing.set((subparser, sub))
+        try:
+            subparser.format_help()
+        finally:
+            composing.reset(token)
+        options.subpages[path] = sub.sect
+
+@argparser
+def parse_known_args(self, original, argv=None, namespace=None):
+    options = page.get()
+    if options is None:
+        return original(self, argv, namespace)
+    if options.subcommands:
+        compose_subpages(self, options)
+    return original(self, ('-h', ), namespace)
+
+# The stream the help currently printed goes to, as the page is written to it right away.
+help_stream = ContextVar('help_stream', default=None)
+
+@argparser
+def print_help(self, original, file=None):
+    if page.get() is None:
+        return original(self, file)
+    token = help_stream.set(file or sys.stdout)
+    try:
+        return original(self, file)
+    finally:
+        help_stream.reset(token)
+
+@argparser
+def _get_formatter(self, original):
+    options = page.get()
+    if options is None:
+        return original(self)
+    parser, sub = composing.get()
+    if parser is self:
+        return sub
+    prog = options.program or self.prog
+    stream = help_stream.get()
+    result = formatter(self, prog, options.short, stream=stream,
+            commands=OrderedDict((' '.join((prog, ) + path), sub)
+                for path, sub in options.subpages.items()))
+    if stream is not None:
+        options.manpage = result.sect
+    return result
+
+# Held while executing a module, as this replaces sys.argv and the standard output.
+execution = RLock()
+
+def dated(options):
+    """Settle the date of the page of a module, unless the options already carry one,
+    on the one fixed by SOURCE_DATE_EPOCH or the day its sources were last modified.
+    Pages of parsers given without a module are left to be dated by their ManPage."""
+    if options.date is None:
+        options.date = source_date()
+    if options.date is None and options.module is not None:
+        from .imports import modified
+        timestamp = modified(options.module)
+        if timestamp is not None:
+            options.date = utc_date(timestamp)
+
+def generate(options, stream):
+    """Execute a module, writing the manual page of the first parser it uses to a stream.
+
+    options -- namespace with the attributes module, program, short, suite, extra, static,
+        subcommands and date, as given on the command line, extra holding pairs of section
+        titles and contents
+    stream -- file-like object to write the page to
+
+    When static is set, the parser is extracted from the source of the module without
+    executing it, if possible. Otherwise, the module is executed until it parses arguments.
+    With subcommands set, a page is composed for every subcommand as well. These are stored
+    in an attribute subpages of the options, mapping the tuple of subcommand names leading
+    to them to their ManPage, and summarized in the page written to the stream. The ManPage
+    written itself is stored in an attribute manpage, for other backends to serialize.
+
+    Without a date, the page is dated as settled by dated once it is formatted, which always
+    yields the same page for the same sources. Returns whether a page was written. This is
+    not the case when the module finished or exited before it attempted to parse its
+    arguments, even when it exited successfully, nor when it exited with an error after.
+    Modules are executed one at a time, even when generating from many threads.
+    """
+    options.subpages, options.manpage = OrderedDict(), None
+    with execution, rendering(options), redirect_stdout(stream):
+        try:
+            if options.static:
+                try:
+                    extract(options.module).parse_args()
+                except Unsupported:
+                    pass
+            run_module(options.module, run_name='__main__',
+                    alter_sys=True) # alter_sys to update program name in argv[0]
+        except SystemExit as exit:
+            return not exit.code and options.manpage is not None
+    return False
+
+class NoPage(Exception):
+    """raised when a module does not parse its arguments with an ArgumentParser"""
+
+def render(parser_or_module, prog=None, short=None, suite=None, extra=(), date=None):
+    """Compose the manual page of an ArgumentParser, or of the module named, as a string.
+
+    prog -- program name to use instead of the one of the parser
+    short -- short description, by default the attribute short of the parser
+    suite -- suite to name in the header, by default the attribute suite of the parser
+    extra -- additional sections as a mapping or pairs of titles and contents
+    date -- date of the page, by default the one fixed by SOURCE_DATE_EPOCH, the last
+        modification of the sources of a module or today for a parser
+
+    Parsers are rendered without changing them and can be rendered from many threads
+    at once. Modules are executed like generate does, but only one at a time. NoPage is
+    raised when they did not parse their arguments, also when they exited successfully.
+    """
+    options = Namespace(module=None, program=prog, short=short, suite=suite,
+            extra=list(extra.items() if hasattr(extra, 'items') else extra),
+            static=False, subcommands=False, subpages=OrderedDict(), format=['roff'],
+            date=date)
+    if isinstance(parser_or_module, str):
+        options.module = parser_or_module
+        stream = StringIO()
+        if not generate(options, stream):
+            raise NoPage("{} did not parse its arguments".format(parser_or_module))
+        return stream.getvalue()
+    with rendering(options):
+        return parser_or_module.format_help()
+
+def produce(options, stream, cache=None):
+    """Write a page to a stream like generate, but reuse it from a cache if given.
+    Pages with subcommands or in formats other than roff are never cached, as they consist
+    of multiple files and are serialized from the ManPage, nor are pages of modules whose
+    source cannot be located, as their key could not cover it."""
+    from .imports import locate, main_module
+    if cache is None or options.subcommands or options.format != ['roff'] \
+            or locate(main_module(options.module)) is None:
+        return generate(options, stream)
+    dated(options)
+    key = cache.key(options)
+    page = cache.get(key)
+    if page is None:
+        buffer = StringIO()
+        success = generate(options, buffer)
+        page = buffer.getvalue()
+        if not success:
+            stream.write(page)
+            return False
+        cache.put(key, page)
+    stream.write(page)
+    return True
+
+def write_bytecode(prefix):
+    """Let the modules imported from now on cache their bytecode below a directory,
+    mirroring the tree of their sources, even when writing bytecode was turned off."""
+    sys.pycache_prefix = path.abspath(prefix)
+    sys.dont_write_bytecode = False
+
+def document_page(options, cache=None):
+    """Generate a single page as described by options parsed from the command line,
+    writing it in every format requested to the output directory they name or printing
+    it otherwise. Returns whether the page was generated."""
+    formats = options.format
+    stem = options.output_dir and path.join(options.output_dir,
+            options.program or options.module.replace('.', '-'))
+    name = stem and stem + backends['roff'].suffix
+    if 'roff' not in formats:
+        output = StringIO()
+    elif stem:
+        try:
+            output = open(name, 'w')
+        except OSError as error:
+            print("{}: {}".format(options.module, error), file=stderr)
+            return False
+    else:
+        output = stdout
+    try:
+        success = produce(options, output, cache)
+    except Exception:
+        print_exc()
+        success = False
+    finally:
+        if output is not stdout:
+            output.close()
+    if not success:
+        if stem and 'roff' in formats:
+            remove(name)
+        return False
+    manpage = getattr(options, 'manpage', None)  # not composed when taken from the cache
+    pages = [((), manpage)] if manpage is not None else []
+    pages.extend(getattr(options, 'subpages', {}).items())
+    try:
+        for format in formats:
+            backend = backends[format]
+            for names, page in pages:
+                if not names and format == 'roff':
+                    continue  # already written while generating
+                if stem:
+                    with open('-'.join((stem, ) + names) + backend.suffix, 'w') as output:
+                        backend.write(page, output)
+                elif not names:
+                    backend.write(page, stdout)
+    except OSError as error:
+        print("{}: {}".format(options.module, error), file=stderr)
+        return False
+    return True
+
+def document(pages, cache=None, jobs=None):
+    """Generate all pages described by a list of options as parsed from the command line.
+
+    Pages are written to the output directory they name or printed otherwise. Errors
+    are reported on standard error without stopping the generation of the remaining
+    pages. Returns whether any of the pages could not be generated.
+
+    When a number of jobs is given, each page is generated in a forked child of the
+    current process, up to that many at once, so that modules cannot affect each other.
+    """
+    if jobs:
+        from .pool import parallel
+        results = parallel(partial(document_page, cache=cache), pages, jobs)
+    else:
+        results = (document_page(options, cache) for options in pages)
+    failed = False
+    for options, success in zip(pages, results):
+        if not success:
+            print("{}: no manual page generated".format(options.module), file=stderr)
+            failed = True
+    return failed
+
+def main(args):
+    """Document the pages of a command line parsed by options.parse, preparing the process
+    as its other options request. Returns whether any of the pages could not be generated."""
+    from .cache import open_cache
+    if args.pycache_prefix:
+        write_bytecode(args.pycache_prefix)
+    from .pool import preload
+    preload(args.preload)
+    from .limits import guard
+    guard(args.pages)
+    if args.lazy_imports:
+        from .lazy import lazy_imports
+        deferring = lazy_imports(args.lazy_allow, args.lazy_deny)
+    else:
+        deferring = nullcontext()
+    with deferring:
+        if args.watch:
+            from .watch import watch
+            return watch(args.pages, open_cache(args))
+        return document(args.pages, open_cache(args), args.jobs)
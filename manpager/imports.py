@@ -0,0 +1,153 @@
+"""
+discovery of the sources a module depends on without executing it
+
+Like the waf tool does for its dependency scanning, the functions in this module
+follow imports recursively. Modules from the standard library or from installed
+distributions end the recursion, all others are followed into their sources. Installed
+modules are told apart by being found in the site directories, whose metadata directories,
+named by distribution and version, are only looked into when any of them is imported.
+"""
+
+from ast import parse, walk, Import, ImportFrom
+from importlib.machinery import PathFinder
+from functools import lru_cache
+from os import path, scandir, stat
+from sys import stdlib_module_names
+import site
+import sys
+
+def find(name, locations=None):
+    """Ask the finders on sys.meta_path for the specification of a module, starting with the
+    PathFinder, so that others, like those of editable installs, are only consulted for
+    modules it cannot find. Returns None when none of them finds it."""
+    for finder in [PathFinder] + [finder for finder in sys.meta_path if finder is not PathFinder]:
+        find_spec = getattr(finder, 'find_spec', None)
+        spec = find_spec and find_spec(name, locations)
+        if spec is not None:
+            return spec
+
+def locate(name):
+    """Find the specification of a module by name without importing its parents.
+    Returns None when it cannot be found."""
+    spec, locations = None, None
+    parts = name.split('.')
+    for depth in range(len(parts)):
+        spec = find('.'.join(parts[:depth + 1]), locations)
+        if spec is None:
+            return None
+        locations = spec.submodule_search_locations
+    return spec
+
+def main_module(name):
+    """Name the module run_module would execute for a module or package name."""
+    spec = locate(name)
+    if spec is not None and spec.submodule_search_locations is not None:
+        return name + '.__main__'
+    return name
+
+@lru_cache(maxsize=None)
+def site_directories():
+    """the directories distributions are installed to"""
+    directories = site.getsitepackages() if hasattr(site, 'getsitepackages') else []
+    if site.ENABLE_USER_SITE:
+        directories.append(site.getusersitepackages())
+    return tuple(path.join(directory, '') for directory in directories)
+
+def installed(spec):
+    """Tell whether a module was found in the site directories."""
+    location = spec.origin or next(iter(spec.submodule_search_locations or ()), '')
+    return location.startswith(site_directories())
+
+def provided(metadata):
+    """the top level module names installed by the distribution described in a directory"""
+    for listing in ('top_level.txt', 'RECORD'):
+        try:
+            with open(path.join(metadata, listing)) as file:
+                names = {line.strip().partition(',')[0].partition('/')[0] for line in file}
+        except OSError:
+            continue
+        return {name[:-3] if name.endswith('.py') else name for name in names if name}
+    return set()
+
+def versions(tops):
+    """the sorted names of the metadata directories of all distributions providing any of
+    some top level module names, which consist of the name and version of the distribution"""
+    tops, found = set(tops), set()
+    for directory in site_directories():
+        try:
+            entries = list(scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.endswith(('.dist-info', '.egg-info')) and entry.is_dir() \
+                    and provided(entry.path) & tops:
+                found.add(entry.name)
+    return sorted(found)
+
+def imported(tree, name, package):
+    """Generate the absolute names of all modules imported in a syntax tree.
+
+    name -- name of the module the tree was parsed from
+    package -- whether the module is a package itself
+    """
+    base = name.split('.') if package else name.split('.')[:-1]
+    for node in walk(tree):
+        if isinstance(node, Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ImportFrom):
+            if node.level:
+                prefix = base[:len(base) - node.level + 1]
+                module = '.'.join(prefix + ([node.module] if node.module else []))
+            else:
+                module = node.module
+            yield module
+            for alias in node.names:
+                yield module + '.' + alias.name  # may be a submodule as well
+
+@lru_cache(maxsize=None)
+def closure(module):
+    """Find the sources a module depends on.
+
+    Returns a dictionary from local module names to the paths of their
+    sources and the set of top level names of external modules imported.
+    Results are remembered, so they must not be modified.
+    """
+    local, external, seen = {}, set(), set()
+    unseen = [main_module(module)]
+    while unseen:
+        name = unseen.pop()
+        top = name.partition('.')[0]
+        if name in seen or top in stdlib_module_names:
+            continue
+        seen.add(name)
+        spec = locate(name)
+        if spec is None:
+            continue
+        if installed(spec):
+            external.add(top)
+            continue
+        if not (spec.origin or '').endswith('.py'):
+            continue
+        local[name] = spec.origin
+        parts = name.split('.')
+        unseen.extend('.'.join(parts[:depth]) for depth in range(1, len(parts)))
+        try:
+            with open(spec.origin, 'rb') as source:
+                tree = parse(source.read(), spec.origin)
+        except SyntaxError:
+            continue
+        unseen.extend(imported(tree, name, spec.submodule_search_locations is not None))
+    return local, external
+
+def modified(module):
+    """Find the latest modification time among the local sources a module depends on, or
+    its own source when it only uses external ones, in seconds since the epoch. Returns
+    None when no source can be found."""
+    sources = list(closure(module)[0].values())
+    if not sources:
+        spec = locate(main_module(module))
+        if spec is not None and spec.has_location:
+            sources = [spec.origin]
+    times = [stat(source).st_mtime for source in sources if path.exists(source)]
+    return max(times) if times else None
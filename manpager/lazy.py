@@ -0,0 +1,71 @@
+"""
+deferred loading of the modules imported while documenting
+
+Most programs import their dependencies at the top, even though they only use them after
+parsing their arguments, which the manpager never lets them get to. A finder placed first
+on sys.meta_path lets importlib.util.LazyLoader wrap the loaders of these modules, so that
+importing them only creates a module object, which executes its source once any of its
+attributes is used. Modules whose attributes are used before arguments are parsed, including
+those imported from with "from module import name", are thus still loaded in full.
+
+Only modules loaded from python sources are deferred, as extension modules cannot be.
+By default, these are all modules installed in the site directories, which holds the
+distributions installed. Modules from the standard library are cheap in comparison, while
+local modules are more likely to build the parser from what they import.
+"""
+
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from importlib.machinery import SourceFileLoader, SourcelessFileLoader
+from importlib.util import LazyLoader
+from .imports import site_directories
+import sys
+
+def matches(name, prefixes):
+    """Tell whether a module is one of the named ones or within them."""
+    return any(name == prefix or name.startswith(prefix + '.') for prefix in prefixes)
+
+class LazyFinder(MetaPathFinder):
+    """Find modules with the finders following it, wrapping their loaders to load lazily.
+    Of several of these on sys.meta_path, only the first decides which modules to defer."""
+
+    def __init__(self, allow=(), deny=()):
+        """Defer loading the modules named in allow, or by default those installed
+        in the site directories. Modules named in deny are never deferred. Both
+        lists apply to the modules named as well as all submodules within them.
+        The manpager itself is never deferred, to not slow it down where it is installed."""
+        self.allow, self.deny = tuple(allow), tuple(deny) + (__package__, )
+        self.directories = site_directories()
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path[sys.meta_path.index(self) + 1:]:
+            if isinstance(finder, LazyFinder):
+                continue  # The first decides, such as that of a request over that of a worker.
+            find_spec = getattr(finder, 'find_spec', None)
+            spec = find_spec and find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if matches(name, self.deny) or self.allow and not matches(name, self.allow) or \
+                type(spec.loader) not in (SourceFileLoader, SourcelessFileLoader) or \
+                not self.allow and not (spec.origin or '').startswith(self.directories):
+            return spec
+        spec.loader = LazyLoader(spec.loader)
+        return spec
+
+def install(allow=(), deny=()):
+    """Defer loading all modules imported from now on, placing
+    a LazyFinder first on sys.meta_path, which is returned."""
+    finder = LazyFinder(allow, deny)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+@contextmanager
+def lazy_imports(allow=(), deny=()):
+    """Defer loading modules imported within the context, see LazyFinder."""
+    finder = install(allow, deny)
+    try:
+        yield finder
+    finally:
+        sys.meta_path.remove(finder)
@@ -0,0 +1,116 @@
+"""
+bounds on the time and memory generating a single page may take
+
+A timeout is enforced by an interval timer raising Timeout, which derives from BaseException
+like KeyboardInterrupt does, so that modules catching Exception do not swallow it. Memory is
+bounded by the soft limit on the address space of the process, making allocations beyond it
+fail with a MemoryError. When either limit is hit, the page fails with an error written to
+standard error as a single line of JSON, naming the module, the limit and the phase that was
+running: preparing, like looking up the cache, importing a module, executing the documented
+module itself or formatting the page.
+Phases are tracked by wrapping the functions starting them, the same way timings does.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from json import dumps
+from resource import getrlimit, setrlimit, RLIMIT_AS
+from signal import signal, setitimer, SIGALRM, ITIMER_REAL
+import builtins
+import sys
+
+class Timeout(BaseException):
+    """raised when generating a page takes longer than its timeout"""
+
+class Limits(object):
+    """The phases of the page currently generated, to report where it exceeded its limits."""
+
+    def __init__(self):
+        self.stack = []
+        self.exceeded = None
+        self.memory = getrlimit(RLIMIT_AS)
+
+    @contextmanager
+    def phase(self, name, detail=None):
+        """Track the context as a phase, optionally detailed by the name of a module."""
+        self.stack.append((name, detail))
+        try:
+            yield
+        except (Timeout, MemoryError):
+            if self.exceeded is None:
+                self.exceeded = self.stack[-1]
+            raise
+        finally:
+            self.stack.pop()
+
+    def report(self, options, limit, **values):
+        """Write the error of a page exceeding a limit to standard error."""
+        phase, detail = self.exceeded
+        error = OrderedDict(module=options.module, limit=limit, phase=phase)
+        if detail:
+            error['importing'] = detail
+        error.update(values)
+        print(dumps(error), file=sys.stderr)
+
+    @contextmanager
+    def bounded(self, options):
+        """Apply the timeout and max_memory given by options within the context."""
+        self.exceeded = None
+        if options.max_memory:
+            setrlimit(RLIMIT_AS, (options.max_memory, self.memory[1]))
+        if options.timeout:
+            setitimer(ITIMER_REAL, options.timeout)
+        try:
+            yield
+        finally:
+            if options.timeout:
+                setitimer(ITIMER_REAL, 0)
+            if options.max_memory:
+                setrlimit(RLIMIT_AS, self.memory)
+
+    def instrument(self):
+        """Patch the generator to bound the resources used by every page produced."""
+        from . import generate
+        def expire(signum, frame):
+            raise Timeout()
+        signal(SIGALRM, expire)
+        parse_known_args = generate.ArgumentParser.parse_known_args
+        @wraps(parse_known_args)
+        def formatting(*args, **kwargs):
+            with self.phase('formatting'):
+                return parse_known_args(*args, **kwargs)
+        generate.ArgumentParser.parse_known_args = formatting
+        generate_page = generate.generate
+        @wraps(generate_page)
+        def execution(*args, **kwargs):
+            with self.phase('execution'):
+                return generate_page(*args, **kwargs)
+        generate.generate = execution
+        produce = generate.produce
+        def bounded(options, *args, **kwargs):
+            if not (options.timeout or options.max_memory):
+                return produce(options, *args, **kwargs)
+            original = builtins.__import__
+            @wraps(original)
+            def importing(name, *args, **kwargs):
+                with self.phase('import', name):
+                    return original(name, *args, **kwargs)
+            builtins.__import__ = importing
+            try:
+                with self.bounded(options), self.phase('preparation'):
+                    return produce(options, *args, **kwargs)
+            except Timeout:
+                self.report(options, 'timeout', seconds=options.timeout)
+            except MemoryError:
+                self.report(options, 'memory', bytes=options.max_memory)
+            finally:
+                builtins.__import__ = original
+            return False
+        generate.produce = bounded
+
+def guard(pages):
+    """Bound the resources used by the pages given as parsed from the command
+    line according to their options timeout and max_memory, if any has one."""
+    if any(options.timeout or options.max_memory for options in pages):
+        Limits().instrument()
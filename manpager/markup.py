@@ -5,7 +5,6 @@ The functions in this module format text according
 to roff syntax, which is used in manual pages.
 """
 
-from functools import partial
 from re import compile, MULTILINE
 
 def listmap(func, list):
@@ -20,39 +19,38 @@ def italic(text):
     """formats a span of running text italic"""
     return r'\fI{}\fP'.format(text)
 
-class OverrideWrapper(object):
-    """A generic wrapper that can selectively modify attributes of the wrapped object.
+class FormattedAction(object):
+    """A view on an Action with option strings formatted bold and metavar italic.
 
-    If a method exists in the wrapper, requesting it will have the same effect as calling it with
-    the member of the same name from the wrapped object as an argument. All other attributes,
-    including such that are set None explicitly, are retrieved directly from the wrapped object.
+    The view is computed once, holding the attributes HelpFormatter reads when formatting
+    usage and invocation. Other attributes are looked up on the action on demand. All
+    attributes without a true value read None, as HelpFormatter has always seen them here.
     """
 
-    def __init__(self, wrapped):
-        """Wraps a given object modifying all attributes defined in the wrapper."""
-        self.wrapped = wrapped
+    __slots__ = ('action', 'option_strings', 'metavar', 'nargs', 'choices', 'dest',
+            'required', 'help')
 
-    @classmethod
-    def generate(cls, name='GeneratedOverrider', **kw):
-        """Create a wrapper class overriding methods given as keyword arguments."""
-        return type(name, (cls, ), kw)
+    def __init__(self, action):
+        """Formats the attributes of a given action."""
+        self.action = action
+        self.option_strings = listmap(bold, action.option_strings) or None
+        self.metavar = italic(action.metavar) if action.metavar else None
+        self.nargs = action.nargs or None
+        self.choices = action.choices or None
+        self.dest = action.dest or None
+        self.required = action.required or None
+        self.help = action.help or None
 
-    def __getattribute__(self, name):
-        original = getattr(super().__getattribute__('wrapped'), name)
-        if original:
-            try:
-                return super().__getattribute__(name)(original)
-            except AttributeError:
-                return original
-
-class FormatWrapper(OverrideWrapper):
-    """Wrap an Action to format option strings bold and metavar italic."""
-    option_strings = staticmethod(partial(listmap, bold))
-    metavar = staticmethod(italic)
+    def __getattr__(self, name):
+        return getattr(self.action, name) or None
 
 
 from collections import OrderedDict
 
+def constant(value):
+    """a function ignoring its argument to always return the same value"""
+    return lambda text: value
+
 class MultiRegexReplacer(object):
     """Replace multiple regular expressions in one pass."""
 
@@ -63,19 +61,23 @@ class MultiRegexReplacer(object):
         callables which will be used to generate a replacement. Note that, other than with
         re.sub, they will not be passed a match object, but the original match as a string.
         Values that are not callable will be used as replacements without further modification.
+
+        Each expression is wrapped in a named group, so that a match
+        can be dispatched to its replacement by the name of its group.
         """
-        expressions, self.replacements = zip(*replaces.items())
-        self.expression = compile('|'.join(map('({})'.format, expressions)), MULTILINE)
+        self.replacements = {}
+        expressions = []
+        for index, (expression, replacement) in enumerate(replaces.items()):
+            name = '_{}'.format(index)
+            expressions.append('(?P<{}>{})'.format(name, expression))
+            self.replacements[name] = replacement if callable(replacement) \
+                    else constant(replacement)
+        self.expression = compile('|'.join(expressions), MULTILINE)
 
     def replace(self, match):
         """Generate the replacement for a single match according
         to the replacement directives given on initialization."""
-        for group, replacement in zip(match.groups(), self.replacements):
-            if group:
-                try:
-                    return replacement(group)
-                except TypeError:
-                    return replacement
+        return self.replacements[match.lastgroup](match.group())
 
     def __call__(self, text):
         return self.expression.sub(self.replace, text)
@@ -87,6 +89,10 @@ class Sanitizer(MultiRegexReplacer):
     condense whitespace and turn double newlines into proper paragraphs.
     """
 
+    # Escaping characters is left to str.replace, which is much faster than dispatching
+    # each match. The expressions replaced below never match any of these characters.
+    escapes = {'-': '\\-'}
+
     def __init__(self, paragraph=".PP"):
         """Initialize a new Sanitizer generating the given paragraph type.
 
@@ -94,7 +100,11 @@ class Sanitizer(MultiRegexReplacer):
         """
         paragraph = '\n' + paragraph + '\n'
         super().__init__(OrderedDict((
-            ('-', '\\-'),
             ('\n\n+', paragraph),
             ('^\\s+|\\s+$', ''),
             ('\\s\\s+', ' '))))
+
+    def __call__(self, text):
+        for character, escape in self.escapes.items():
+            text = text.replace(character, escape)
+        return super().__call__(text)
@@ -0,0 +1,246 @@
+"""
+command line options of the manpager
+
+The options are parsed before importing the generator, so that
+the manpager does not pay for loading it when it is not needed.
+"""
+
+from argparse import ArgumentParser, ArgumentTypeError, FileType, Namespace
+from datetime import date
+from re import compile, DOTALL
+from shlex import split
+from os import environ, getuid, path
+from tempfile import gettempdir
+from .cache import default_directory
+import sys
+
+section_pattern = compile('([A-Z ]+) (.*)', DOTALL)
+
+def section(text):
+    """Split the argument of an additional section into its title and content."""
+    match = section_pattern.match(text)
+    if not match:
+        raise ArgumentTypeError("{!r} does not start with a title in all caps".format(text))
+    return match.groups()
+
+def formats(text):
+    """Split a comma separated list of output formats, checking that a backend exists for each."""
+    from .backends import backends
+    result = text.split(',')
+    for format in result:
+        if format not in backends:
+            raise ArgumentTypeError("unknown format {!r}, choose from {}".format(
+                format, ', '.join(backends)))
+    return result
+
+def page_options(parser):
+    """Add the options customizing a single manual page to a parser and return it."""
+    parser.add_argument('-d', '--short', metavar="DESCRIPTION", help="""
+            Specifies a short description to add in the NAME section. This can also be set
+            on the ArgumentParser itself by assigning it an attribute 'short'. This will
+            be the summary shown by apropos. When not given, this will just consist
+            of the executable name. The inherent description text given at ArgumentParser
+            construction will always end up in the DESCRIPTION section.""")
+    parser.add_argument('-s', '--suite', help="""Specifies the suite to insert into the header.
+            If not given and the program sets an attribute 'suite' on its ArgumentParser,
+            this will be used. If neither is present, the program name will be used.""")
+    parser.add_argument('-e', '--extra', help="""Add an additional section at the end of
+            the page. All words that are written in all caps at the start of the argument
+            will be used as the section title, the remainder is considered its body.
+
+            If the ArgumentParser used by the module itself has an extrasections attribute
+            as well, this will be treated as a mapping from titles to contents of additional
+            sections.
+
+            When both are present, content given as arguments will be
+            appended at the end, overwriting sections with the same name.""",
+            action="append", default=[], type=section)
+    parser.add_argument('-p', '--program', help="""When the program does not
+            manually set its name, the basename of the file executed will be used.
+            This option overrides this as well as an explicitly set name.""")
+    parser.add_argument('-o', '--output-dir', metavar="DIRECTORY", help="""Write each page
+            to a file in this directory instead of printing it. The file is named after the
+            program, when given, or the module otherwise, with dots replaced by dashes,
+            and suffixed by the section number. This is mandatory when documenting
+            more than one module.""")
+    parser.add_argument('-f', '--format', metavar="FORMATS", type=formats, default=['roff'],
+            help="""Write the page in these comma separated formats, roff for the manual
+            page itself, html, md for Markdown or json. All of them are serialized from the
+            same page, composed only once, and named like the manual page, suffixed by the
+            format instead of the section number. More than one format needs an output
+            directory.""")
+    parser.add_argument('--date', type=date.fromisoformat, help="""Date the page, given as
+            YYYY-MM-DD. By default, this is the date fixed by the environment variable
+            SOURCE_DATE_EPOCH, or otherwise the day the sources of the module were last
+            modified, so that the page does not change unless they do.""")
+    parser.add_argument('--static', action='store_true', help="""Try to reconstruct the
+            argument parser from the source of the module without executing it. This avoids
+            the cost of imports and other side effects, but only works when the parser is
+            built from literals and constants alone. When the module constructs it in any
+            other way, the manpager silently falls back to executing it.""")
+    parser.add_argument('--subcommands', action='store_true', help="""Compose a page for
+            every subcommand of the program as well, named by the program and the subcommand
+            joined by a dash. These are only written when an output directory is given. The
+            page of the program itself then summarizes all subcommands in a section.""")
+    parser.add_argument('--timeout', metavar="SECONDS", type=float, help="""Give up on
+            the page when generating it takes longer than this, for modules that connect
+            somewhere or sleep when executed.""")
+    parser.add_argument('--max-memory', metavar="SIZE", type=size, help="""Give up on the
+            page when generating it makes the address space of the process grow beyond this
+            size in bytes, which may be suffixed by K, M or G. This includes the memory the
+            manpager itself and the python interpreter occupy.
+
+            A page exceeding either limit fails with an error on standard error, given as a
+            line of JSON naming the module, the limit and the phase the generation was in.""")
+    return parser
+
+def default_address():
+    """the socket path a worker listens on when none is given explicitly"""
+    return environ.get('MANPAGER_SOCKET') or path.join(
+            environ.get('XDG_RUNTIME_DIR') or gettempdir(),
+            'manpager-{}.sock'.format(getuid()))
+
+def size(text):
+    """Parse a size in bytes, optionally suffixed by one of the binary prefixes K, M or G."""
+    text = text.strip().upper()
+    factor = 1 << 10 * ('KMG'.index(text[-1]) + 1) if text[-1:] in ('K', 'M', 'G') else 1
+    return int(text.rstrip('KMG')) * factor
+
+def positive(text):
+    """Parse a whole number of at least one."""
+    number = int(text)
+    if number < 1:
+        raise ArgumentTypeError("{!r} is not a positive number".format(text))
+    return number
+
+def cache_options(parser):
+    """Add the options locating the page cache to a parser and return it."""
+    parser.add_argument('--cache-dir', metavar="DIRECTORY", default=default_directory(),
+            help="""Where to store generated pages for reuse. Defaults to the directory
+            named by the environment variable MANPAGER_CACHE or manpager in the users
+            cache directory. Point it to a shared location to reuse pages across
+            machines and clean checkouts.""")
+    parser.add_argument('--cache-size', metavar="SIZE", type=size, default=size('64M'),
+            help="""Evict the least recently used pages when the cache grows larger
+            than this size in bytes, which may be suffixed by K, M or G.""")
+    return parser
+
+def parse_cache(argv):
+    """Parse the command line of the cache subcommand."""
+    parser = cache_options(ArgumentParser(prog="manpager cache",
+        description="Manages the cache of generated manual pages."))
+    parser.add_argument('cache_command', metavar="command", choices=('stats', 'prune'),
+            help="""either stats to show the number and size of pages stored,
+            or prune to evict pages until the cache does not exceed its size""")
+    parser.add_argument('--max-size', metavar="SIZE", type=size, help="""size to prune
+            the cache to instead of its configured size, 0 to remove all pages""")
+    return parser.parse_args(argv)
+
+def parse(argv=None, short=None):
+    """Parse the command line, by default the one of the current process.
+
+    short -- short description of the manpager itself
+
+    When the cache subcommand is given, the namespace returned only holds the options
+    of this command. Otherwise, the modules to document are gathered from the command
+    line as well as all manifests given, and returned as a list of namespaces holding the
+    options for each page in an attribute named pages of the namespace returned. Exits
+    when the options are invalid.
+    """
+    parser = page_options(ArgumentParser(
+        description="Generates a manpage from an argparse help text."))
+    parser.short = short
+    parser.add_argument('module', nargs='*', help="""modules to generate manpages for.
+            All of them are executed one after another in the same interpreter.""")
+    parser.add_argument('-m', '--manifest', action="append", default=[], type=FileType(),
+            help="""Read further modules from a file. Each line names a module, optionally
+            preceded by the options above, quoted as in a shell. These take precedence
+            over the ones given on the command line, which serve as defaults for every
+            module. Empty lines and comments starting with a hash are ignored.""")
+    parser.add_argument('--serve', metavar="SOCKET", nargs='?', const=default_address(),
+            help="""Instead of documenting modules, keep running as a worker listening on
+            a unix socket, by default the one named by the environment variable
+            MANPAGER_SOCKET or manpager-UID.sock in the runtime directory. Each
+            connection is served by a forked process, which receives command line,
+            environment and standard streams to document modules as a separate
+            manpager process would, but without the startup costs. Modules named with
+            --preload are imported by the worker itself, so that every request finds them
+            loaded, and --lazy-imports applies to all requests not giving it themselves.""")
+    cache_options(parser).add_argument('--no-cache', action='store_true', help="""
+            Always execute the modules instead of reusing a page generated before. The
+            cache can be inspected and pruned with the "cache" subcommand, see
+            "manpager cache --help", which also means a module named "cache" can only be
+            documented after another option or a double dash.""")
+    parser.add_argument('-j', '--jobs', metavar="N", type=positive, help="""Generate each page
+            in a forked child process, running up to N of them at once. This keeps modules
+            from affecting each other, while all of them share the modules preloaded.""")
+    parser.add_argument('--preload', metavar="MODULES", action='extend', default=[],
+            type=lambda text: text.split(','), help="""Import these comma separated modules
+            once before generating any page, so that the modules documented find them loaded
+            already. Mostly useful with --jobs or --serve, to share common dependencies
+            among all children. Modules documented should not be preloaded themselves.""")
+    parser.add_argument('--lazy-imports', action='store_true', help="""Defer loading
+            the modules the documented ones import from installed distributions until they
+            actually use them. As programs mostly do not use their dependencies before parsing
+            their arguments, these are often never loaded at all. Modules extracting names
+            with "from module import name" are still loaded right away.""")
+    parser.add_argument('--lazy-allow', metavar="MODULES", action='extend', default=[],
+            type=lambda text: text.split(','), help="""Only defer loading these comma
+            separated modules and their submodules with --lazy-imports, which may be local
+            ones as well, instead of all modules installed.""")
+    parser.add_argument('--lazy-deny', metavar="MODULES", action='extend', default=[],
+            type=lambda text: text.split(','), help="""Never defer loading these comma
+            separated modules and their submodules, for those that do not work when loaded
+            lazily, for example because they build the parser from what they import.""")
+    parser.add_argument('--pycache-prefix', metavar="DIRECTORY", help="""Write the bytecode
+            of the modules imported to this directory instead of next to their sources,
+            like setting PYTHONPYCACHEPREFIX does, so that it can be reused by later runs
+            without cluttering the source tree. This also applies when writing bytecode
+            was turned off, for example by running python with -B.""")
+    parser.add_argument('--watch', action='store_true', help="""Keep running after
+            writing the pages, to write them again whenever the local sources of their modules
+            change, until interrupted. Modules from the standard library and installed
+            distributions stay loaded in between, so only the changed sources are imported
+            anew. Pages are written to their output directory, which is mandatory, where they
+            can be viewed with "man -l". The pages are always generated in this process,
+            regardless of --jobs.""")
+    parser.add_argument('--timings', action='store_true', help="""Report the wall and CPU
+            time spent in each phase of the run, for every page the time spent in the imports
+            of the module, the rest of its execution up to parsing its arguments, formatting,
+            dating it by its sources, sanitizing text, serializing and caching the page.
+            Pages generated in children with --jobs are left out.""")
+    parser.add_argument('--timings-format', metavar="FORMAT", choices=('text', 'json'),
+            default='text', help="Report the timings as text, the default, or as json.")
+    parser.add_argument('--timings-file', metavar="FILE",
+            help="Write the timings report to this file instead of standard error.")
+    parser.add_argument('--profile', metavar="FILE", help="""Profile the run with cProfile,
+            writing the statistics to this file, to be inspected with the pstats module.""")
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ['cache']:
+        return parse_cache(argv[1:])
+    args = parser.parse_args(argv)
+    args.cache_command = None
+
+    defaults = vars(args).copy()
+    args.pages = [Namespace(**dict(defaults, module=module)) for module in args.module]
+    for manifest in args.manifest:
+        entry = page_options(ArgumentParser(prog=manifest.name, add_help=False))
+        entry.add_argument('module')
+        for line in manifest:
+            line = split(line, comments=True)
+            if line:
+                args.pages.append(entry.parse_args(line, Namespace(**defaults)))
+        manifest.close()
+    if args.serve:
+        if args.pages:
+            parser.error("modules cannot be documented while serving")
+    elif not args.pages:
+        parser.error("no module given")
+    if len(args.pages) > 1 and not all(page.output_dir for page in args.pages):
+        parser.error("an output directory is needed to document more than one module")
+    if args.watch and not all(page.output_dir for page in args.pages):
+        parser.error("an output directory is needed to watch modules")
+    if any(len(page.format) > 1 and not page.output_dir for page in args.pages):
+        parser.error("an output directory is needed to write more than one format")
+    return args
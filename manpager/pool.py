@@ -0,0 +1,77 @@
+"""
+execution of functions in forked children of a process with preloaded modules
+
+Modules imported before forking are shared copy-on-write by all children, so that each of
+them starts out with these already loaded, while no child can affect the state of another.
+"""
+
+from importlib import import_module
+from os import fork, dup2, waitpid, waitstatus_to_exitcode, _exit
+from shutil import copyfileobj
+from tempfile import TemporaryFile
+from traceback import print_exc
+import sys
+
+def preload(names):
+    """Import modules by name, reporting the ones that fail on standard error."""
+    for name in names:
+        try:
+            import_module(name)
+        except Exception:
+            print_exc()
+            print("{}: could not be preloaded".format(name), file=sys.stderr)
+
+def forked(function, argument):
+    """Call a function with an argument in a forked child, capturing its standard error.
+
+    Returns the process id of the child and the temporary file capturing its errors.
+    The child exits successfully when the function returns a true value."""
+    errors = TemporaryFile()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = fork()
+    if pid:
+        return pid, errors
+    status = 1
+    try:
+        dup2(errors.fileno(), 2)
+        status = 0 if function(argument) else 1
+    except BaseException:
+        print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        _exit(status)
+
+def parallel(function, arguments, jobs):
+    """Call a function with each argument in forked children, running up to jobs at once.
+
+    Generates whether each call returned a true value, in the order of the arguments. What
+    the children wrote to standard error is replayed right before the corresponding result.
+    """
+    pending = iter(arguments)
+    running, results, captured = {}, {}, []
+    reported = 0
+    while True:
+        while len(running) < jobs:
+            try:
+                argument = next(pending)
+            except StopIteration:
+                break
+            pid, errors = forked(function, argument)
+            running[pid] = len(captured)
+            captured.append(errors)
+        if not running:
+            break
+        pid, status = waitpid(-1, 0)
+        if pid in running:
+            results[running.pop(pid)] = waitstatus_to_exitcode(status) == 0
+        while reported in results:
+            errors = captured[reported]
+            errors.seek(0)
+            sys.stderr.flush()
+            copyfileobj(errors, sys.stderr.buffer)
+            sys.stderr.buffer.flush()
+            errors.close()
+            yield results.pop(reported)
+            reported += 1
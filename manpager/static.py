@@ -0,0 +1,226 @@
+"""
+extraction of argument parsers from module sources without executing them
+
+The functions in this module rebuild the ArgumentParser a module would construct by
+walking its syntax tree, evaluating only literals and module level constants. Whenever
+the parser construction depends on anything more dynamic, like loops, conditions or
+computed values, the extraction gives up, so that the module has to be executed instead.
+Constants are names assigned a literal unconditionally at the top level of the module and
+bound nowhere else, as their value could differ where the parser is built otherwise.
+"""
+
+from argparse import ArgumentParser, ArgumentError
+from ast import NodeVisitor, parse, walk, literal_eval, get_docstring, alias, \
+        Assign, AsyncFunctionDef, Attribute, Call, ClassDef, Compare, Constant, Eq, \
+        ExceptHandler, FunctionDef, Global, If, Load, Name, Nonlocal
+from itertools import chain
+from os import path
+from .imports import locate, main_module
+
+class Unsupported(Exception):
+    """raised when a module cannot be evaluated statically"""
+
+def find_source(module):
+    """Locate the file run_module would execute for a module name without importing anything."""
+    spec = locate(main_module(module))
+    if spec is None or not (spec.origin or '').endswith('.py'):
+        raise Unsupported("no source found for {}".format(module))
+    return spec.origin
+
+# methods of parsers and groups that build up the argument structure
+construction = {'add_argument', 'add_argument_group', 'add_mutually_exclusive_group'}
+
+# methods that do not change how a parser is documented
+inconsequential = {'parse_args', 'parse_known_args', 'parse_intermixed_args',
+        'parse_known_intermixed_args', 'set_defaults', 'get_default', 'error', 'exit',
+        'print_help', 'print_usage', 'format_help', 'format_usage'}
+
+# keywords whose values do not show up in the manual page, unless referenced in the help
+irrelevant = {'type', 'formatter_class', 'default', 'version'}
+
+def is_main_guard(test):
+    """Tell whether an expression is the check for __name__ == '__main__'."""
+    return isinstance(test, Compare) and isinstance(test.left, Name) \
+            and test.left.id == '__name__' and len(test.ops) == 1 \
+            and isinstance(test.ops[0], Eq) and isinstance(test.comparators[0], Constant) \
+            and test.comparators[0].value == '__main__'
+
+def unconditional(tree):
+    """Generate the statements a module always executes at its top level,
+    including those guarded by the check for __name__ == '__main__'."""
+    for statement in tree.body:
+        if isinstance(statement, If) and is_main_guard(statement.test) \
+                and not statement.orelse:
+            yield from statement.body
+        else:
+            yield statement
+
+def rebound(tree):
+    """Find the names a module binds anywhere but in unconditional
+    assignments of a single name at its top level."""
+    trusted = {id(statement.targets[0]) for statement in unconditional(tree)
+            if isinstance(statement, Assign) and len(statement.targets) == 1
+            and isinstance(statement.targets[0], Name)}
+    names = set()
+    for node in walk(tree):
+        if isinstance(node, Name):
+            if not isinstance(node.ctx, Load) and id(node) not in trusted:
+                names.add(node.id)
+        elif isinstance(node, (FunctionDef, AsyncFunctionDef, ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, alias):
+            names.add((node.asname or node.name).partition('.')[0])
+        elif isinstance(node, ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (Global, Nonlocal)):
+            names.update(node.names)
+    return names
+
+class Extractor(NodeVisitor):
+    """Visit a module, replaying all calls constructing argument parsers."""
+
+    def __init__(self, prog, doc, rebound=()):
+        """Start replaying the module of a program with a docstring.
+        Names in rebound are never considered constants, see the function of that name."""
+        self.prog = prog
+        self.rebound = set(rebound)
+        self.constants = {name: value for name, value
+                in (('__doc__', doc), ('__name__', '__main__')) if name not in self.rebound}
+        self.objects = {}
+        self.parser = None
+        self.conditional = 0
+
+    def evaluate(self, node):
+        """Evaluate a literal or a module level constant."""
+        if isinstance(node, Name) and node.id in self.constants:
+            return self.constants[node.id]
+        try:
+            return literal_eval(node)
+        except ValueError:
+            raise Unsupported("cannot evaluate line {}".format(node.lineno))
+
+    def arguments(self, call):
+        """Evaluate the arguments of a call, skipping irrelevant keywords that cannot be."""
+        if any(keyword.arg is None for keyword in call.keywords):
+            raise Unsupported("keyword unpacking in line {}".format(call.lineno))
+        args = [self.evaluate(arg) for arg in call.args]
+        kwargs = {}
+        skipped = []
+        for keyword in call.keywords:
+            try:
+                kwargs[keyword.arg] = self.evaluate(keyword.value)
+            except Unsupported:
+                if keyword.arg not in irrelevant:
+                    raise
+                skipped.append(keyword.arg)
+        if any('%({})'.format(name) in (kwargs.get('help') or '') for name in skipped):
+            raise Unsupported("help in line {} depends on a value".format(call.lineno))
+        return args, kwargs
+
+    def receiver(self, node):
+        """Find the parser or group a method is called on."""
+        if isinstance(node, Name) and node.id in self.objects:
+            return self.objects[node.id]
+        elif isinstance(node, Call):
+            return self.call(node)
+
+    def call(self, node):
+        """Replay a call if it constructs a parser, returning the parser or group built."""
+        func = node.func
+        if isinstance(func, Name) and func.id == 'ArgumentParser' or \
+                isinstance(func, Attribute) and func.attr == 'ArgumentParser':
+            if self.parser or self.conditional:
+                raise Unsupported("ambiguous parser in line {}".format(node.lineno))
+            args, kwargs = self.arguments(node)
+            kwargs.pop('formatter_class', None)
+            kwargs.setdefault('prog', self.prog)
+            self.parser = ArgumentParser(*args, **kwargs)
+            return self.parser
+        if isinstance(func, Attribute):
+            receiver = self.receiver(func.value)
+            if func.attr in construction:
+                if receiver is None or self.conditional:
+                    raise Unsupported("unknown {} in line {}".format(func.attr, node.lineno))
+                args, kwargs = self.arguments(node)
+                kwargs.pop('type', None)
+                return getattr(receiver, func.attr)(*args, **kwargs)
+            elif receiver is not None:
+                if func.attr not in inconsequential:
+                    raise Unsupported("{} in line {}".format(func.attr, node.lineno))
+                return None
+            if not isinstance(func.value, Call):
+                self.visit(func.value)
+            for argument in chain(node.args, node.keywords):
+                self.visit(argument)
+        else:
+            self.generic_visit(node)
+
+    def visit_Call(self, node):
+        self.call(node)
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            if isinstance(target, Attribute) and isinstance(target.value, Name) \
+                    and target.value.id in self.objects:
+                setattr(self.objects[target.value.id], target.attr, self.evaluate(node.value))
+                return
+        result = self.call(node.value) if isinstance(node.value, Call) else self.visit(node.value)
+        if result is not None:
+            for target in node.targets:
+                if not isinstance(target, Name):
+                    raise Unsupported("parser stored in line {}".format(node.lineno))
+                self.objects[target.id] = result
+            return
+        if len(node.targets) == 1 and isinstance(node.targets[0], Name):
+            name = node.targets[0].id
+            try:
+                if name in self.rebound:
+                    raise ValueError(name)
+                self.constants[name] = literal_eval(node.value)
+            except ValueError:
+                self.constants.pop(name, None)
+        for target in node.targets:
+            self.visit(target)
+
+    def visit_Return(self, node):
+        if not (isinstance(node.value, Name) and node.value.id in self.objects):
+            self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id in self.objects:
+            raise Unsupported("parser passed on in line {}".format(node.lineno))
+
+    def conditionally(self, node):
+        self.conditional += 1
+        self.generic_visit(node)
+        self.conditional -= 1
+
+    visit_For = visit_AsyncFor = visit_While = visit_Try = conditionally
+
+    def visit_If(self, node):
+        if is_main_guard(node.test) and not node.orelse:
+            self.generic_visit(node)
+        else:
+            self.conditionally(node)
+
+def extract(module):
+    """Build the ArgumentParser of a module from its source.
+
+    Raises Unsupported when the module cannot be found, its source
+    does not construct exactly one parser or does so dynamically.
+    """
+    source = find_source(module)
+    with open(source, 'rb') as file:
+        try:
+            tree = parse(file.read(), source)
+        except SyntaxError as error:
+            raise Unsupported(str(error))
+    extractor = Extractor(path.basename(source), get_docstring(tree, clean=False),
+            rebound(tree))
+    try:
+        extractor.visit(tree)
+    except (ArgumentError, TypeError, ValueError) as error:
+        raise Unsupported(str(error))
+    if not extractor.parser:
+        raise Unsupported("no parser found in {}".format(source))
+    return extractor.parser
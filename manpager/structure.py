@@ -5,7 +5,19 @@ The classes in this module model the headers, sections and subsections a manual
 composed of, so that they can be dynamically created and modified, mainly by adding subelements.
 """
 
-from datetime import date
+from datetime import datetime, timezone
+from os import environ
+
+def utc_date(timestamp):
+    """the date in UTC at a number of seconds since the epoch"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+def source_date():
+    """the date fixed by the environment variable SOURCE_DATE_EPOCH
+    for reproducible builds, or None when it is not set"""
+    epoch = environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return utc_date(int(epoch))
 
 class Container(list):
     """
@@ -14,10 +26,16 @@ class Container(list):
 
     The first element is a title, composed on construction by the header
     function using the tag attribute, which subclasses may want to override.
+    The title itself is kept in the attribute of the same name.
+
+    Serialization can either compose a complete string or stream the page line by line.
     """
 
+    __slots__ = ('title', )
+
     def __init__(self, title, *args):
         """Compose a title and adds all further given arguments after it."""
+        self.title = title
         super().__init__((self.header(title), ) + args)
 
     def __lshift__(self, element):
@@ -29,9 +47,27 @@ class Container(list):
         """Compose a header of the form '.{self.tag} {title}'"""
         return '.{tag} {title}'.format(tag=self.tag, title=title)
 
+    def iter_lines(self):
+        """Generate the serialized contents recursively, one element at a time.
+        Elements other than containers are converted to strings as they are."""
+        for element in self:
+            if isinstance(element, Container):
+                yield from element.iter_lines()
+            else:
+                yield str(element)
+
+    def write(self, stream):
+        """Write the container and all its contents recursively to a stream,
+        separating lines by newlines without terminating the last one."""
+        lines = self.iter_lines()
+        stream.write(next(lines))
+        for line in lines:
+            stream.write('\n')
+            stream.write(line)
+
     def __str__(self):
         """Print the container and all its contents recursively."""
-        return '\n'.join(map(str, self))
+        return '\n'.join(self.iter_lines())
 
     def __bool__(self):
         """The container is considered truthy if it contains anything more than the title."""
@@ -46,6 +82,8 @@ class SectionContainer(Container):
     function to initialize a freshly initialized subsection when passed a title.
     """
 
+    __slots__ = ()
+
     def __truediv__(self, title):
         """Add a new subsection with the given title and return it."""
         subsection = self.subtype(title)
@@ -54,17 +92,25 @@ class SectionContainer(Container):
 
 class SS(Container):
     """subsection"""
+    __slots__ = ()
     tag = 'SS'
 
 class SH(SectionContainer):
     """section"""
+    __slots__ = ()
     tag = 'SH'
     subtype = SS
 
 class TH(SectionContainer):
-    """title, i.e. a whole man page"""
+    """title, i.e. a whole man page, dated by the attribute date"""
+    __slots__ = ('date', )
     subtype = SH
-    @staticmethod
-    def header(title):
+
+    def __init__(self, title, *args, date=None):
+        """Date the page by the date given, the one fixed by SOURCE_DATE_EPOCH or today."""
+        self.date = date or source_date() or datetime.now().date()
+        super().__init__(title, *args)
+
+    def header(self, title):
         return '.TH "{prog}" 1 {date} "" "General Commands Manual"'.format(
-                prog=title, date=date.today().isoformat())
+                prog=title, date=self.date.isoformat())
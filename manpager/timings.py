@@ -0,0 +1,168 @@
+"""
+measurement of the time spent in the phases of generating manual pages
+
+Instrumenting a run wraps the functions marking the start of each phase, the same way the
+generator patches the ArgumentParser. Every phase is charged only the time not spent in the
+phases nested within it. Per page, these are the imports executed by the module, the rest of
+its execution up to parsing arguments, called construction, the formatting of the page and
+within it, dating, sanitizing text and serializing the page, as well as looking up the cache.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from json import dump
+from os import sysconf
+from time import perf_counter, process_time
+import builtins
+import sys
+
+def clock():
+    """the current wall and CPU time"""
+    return perf_counter(), process_time()
+
+def started():
+    """Measure the wall and CPU time elapsed since the process started.
+    The wall time is None where it cannot be determined."""
+    cpu = process_time()
+    try:
+        with open('/proc/self/stat') as stat:
+            ticks = int(stat.read().rpartition(')')[2].split()[19])
+        with open('/proc/uptime') as uptime:
+            wall = float(uptime.read().split()[0]) - ticks / sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        wall = None
+    return wall, cpu
+
+class Timings(object):
+    """Wall and CPU times accumulated per phase, for the manpager itself and every page."""
+
+    def __init__(self, startup=None, mark=None):
+        """Start measuring the manpager, which took startup to launch, if given.
+
+        mark -- wall and CPU time the manpager started at, by default now"""
+        self.process = OrderedDict()
+        if startup:
+            self.process['startup'] = list(startup)
+        self.pages = []
+        self.phases = self.process
+        self.stack = ['manpager']
+        self.mark = mark or clock()
+
+    def charge(self):
+        """Add the time passed since the last charge to the phase currently active."""
+        now = clock()
+        times = self.phases.setdefault(self.stack[-1], [0.0, 0.0])
+        for index in range(2):
+            times[index] += now[index] - self.mark[index]
+        self.mark = now
+
+    @contextmanager
+    def phase(self, name):
+        """Charge the time spent in the context to the named phase."""
+        self.charge()
+        self.stack.append(name)
+        try:
+            yield
+        finally:
+            self.charge()
+            self.stack.pop()
+
+    @contextmanager
+    def page(self, module):
+        """Measure the phases within the context separately for the page of a module."""
+        self.charge()
+        self.phases = OrderedDict()
+        self.pages.append((module, self.phases))
+        self.stack.append('construction')
+        try:
+            yield
+        finally:
+            self.charge()
+            self.stack.pop()
+            self.phases = self.process
+
+    def timed(self, name, function):
+        """Wrap a function to charge the time spent in it to a phase."""
+        @wraps(function)
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return timed
+
+    def instrument(self):
+        """Patch the generator to record the phases of every page produced."""
+        from . import generate, markup, structure, cache
+        for cls, name, phase in ((generate.ArgumentParser, 'parse_known_args', 'formatting'),
+                (generate, 'dated', 'dating'),
+                (markup.Sanitizer, '__call__', 'sanitizing'),
+                (structure.Container, 'write', 'serialization'),
+                (structure.Container, '__str__', 'serialization'),
+                (cache.Cache, 'key', 'caching'),
+                (cache.Cache, 'get', 'caching'),
+                (cache.Cache, 'put', 'caching')):
+            setattr(cls, name, self.timed(phase, getattr(cls, name)))
+        produce = generate.produce
+        def measured(options, *args, **kwargs):
+            original = builtins.__import__
+            builtins.__import__ = self.timed('import', original)
+            try:
+                with self.page(options.module):
+                    return produce(options, *args, **kwargs)
+            finally:
+                builtins.__import__ = original
+        generate.produce = measured
+
+    def report(self):
+        """Compose the times measured as a dictionary."""
+        self.charge()
+        def phases(times):
+            return OrderedDict((name, dict(wall=wall, cpu=cpu))
+                    for name, (wall, cpu) in times.items())
+        return dict(phases=phases(self.process), pages=[dict(module=module,
+            phases=phases(times)) for module, times in self.pages])
+
+def text(report, stream):
+    """Write a report as a human readable table."""
+    def phases(indent, times):
+        for name, time in times.items():
+            stream.write('{}{:<{}} {:>9} {:>9.4f}\n'.format(indent, name, 16 - len(indent),
+                '-' if time['wall'] is None else '{:.4f}'.format(time['wall']), time['cpu']))
+    stream.write('{:<16} {:>9} {:>9}\n'.format('phase', 'wall [s]', 'cpu [s]'))
+    phases('', report['phases'])
+    for page in report['pages']:
+        stream.write(page['module'] + '\n')
+        phases('  ', page['phases'])
+
+def json(report, stream):
+    """Write a report as JSON."""
+    dump(report, stream, indent=2)
+    stream.write('\n')
+
+formats = OrderedDict((('text', text), ('json', json)))
+
+@contextmanager
+def instrumented(args, startup=None, mark=None):
+    """Profile and measure the phases of the run within the context, as requested by the
+    options profile, timings, timings_format and timings_file.
+    See Timings for the other arguments."""
+    if args.profile:
+        from cProfile import Profile
+        profile = Profile()
+        profile.enable()
+    if args.timings:
+        timings = Timings(startup, mark)
+        timings.instrument()
+    try:
+        yield
+    finally:
+        if args.profile:
+            profile.disable()
+            profile.dump_stats(args.profile)
+        if args.timings:
+            stream = open(args.timings_file, 'w') if args.timings_file else sys.stderr
+            try:
+                formats[args.timings_format](timings.report(), stream)
+            finally:
+                if args.timings_file:
+                    stream.close()
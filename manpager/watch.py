@@ -0,0 +1,62 @@
+"""
+regeneration of manual pages whenever the sources of their modules change
+
+Watching keeps the manpager running, so that every module imported stays loaded between
+renderings. Only the local modules found by the import closure are watched, by polling the
+status of their sources. When any of them changes, these are evicted from sys.modules to be
+imported afresh, while the standard library and installed distributions are reused as they are.
+"""
+
+from argparse import Namespace
+from importlib import invalidate_caches
+from os import stat
+from sys import modules, stderr
+from time import sleep
+from .generate import document
+from .imports import closure, locate, main_module
+
+def sources(pages):
+    """Map the paths of the local sources of the modules of all pages to their module names.
+    Modules only importing external ones are represented by their own source."""
+    closure.cache_clear()
+    result = {}
+    for options in pages:
+        local = closure(options.module)[0]
+        if local:
+            result.update((source, name) for name, source in local.items())
+        else:
+            name = main_module(options.module)
+            spec = locate(name)
+            if spec is not None and spec.has_location:
+                result[spec.origin] = name
+    return result
+
+def snapshot(paths):
+    """the modification time and size of each of the files, None for missing ones"""
+    result = {}
+    for path in paths:
+        try:
+            status = stat(path)
+            result[path] = status.st_mtime_ns, status.st_size
+        except OSError:
+            result[path] = None
+    return result
+
+def watch(pages, cache=None, interval=0.5):
+    """Document pages like document does, and again every time one of their local
+    sources changes, checking every interval seconds, until interrupted.
+    Returns whether any of the pages could not be generated the last time."""
+    failed = False
+    try:
+        while True:
+            watched = sources(pages)
+            before = snapshot(watched)
+            failed = document([Namespace(**vars(options)) for options in pages], cache)
+            print("watching {} sources for changes".format(len(watched)), file=stderr)
+            while snapshot(watched) == before:
+                sleep(interval)
+            for name in watched.values():
+                modules.pop(name, None)
+            invalidate_caches()
+    except KeyboardInterrupt:
+        return failed
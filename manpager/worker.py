@@ -0,0 +1,103 @@
+"""
+persistent manpager process serving requests over a unix socket
+
+A worker keeps the interpreter and the manpager itself loaded. For each connection, it forks a
+child that takes over the standard streams, environment, working directory and command line of
+the client, so that it behaves exactly like a freshly started manpager process would. As the
+ArgumentParser is only patched in the child, every request starts out from a clean state.
+Modules preloaded by the worker are inherited by all children, so that common dependencies of
+the modules documented only need to be imported once, and with lazy imports, these are set
+up in the worker already, so that they apply to all requests not setting them up themselves.
+
+The client sends its three standard stream file descriptors along with a JSON object holding
+the keys "argv", "env" and "cwd", terminated by a newline. The worker answers with the exit
+status of the child as a decimal number and closes the connection. Only clients running as the
+same user as the worker are served, as anyone else could run code as this user otherwise.
+"""
+
+from json import loads
+from os import environ, chdir, dup2, close, chmod, unlink, getuid, path
+from socket import recv_fds, SOL_SOCKET
+from struct import calcsize, unpack
+import socket
+from socketserver import BaseRequestHandler, ForkingMixIn, UnixStreamServer
+from traceback import print_exc
+from signal import signal, SIGTERM, default_int_handler
+from . import formatter # Loaded once to be inherited by all children.
+import sys
+
+def exit_status(code):
+    """Convert the code of a SystemExit to the exit status of a process."""
+    if code is None or isinstance(code, int):
+        return code or 0
+    print(code, file=sys.stderr)
+    return 1
+
+def peer_uid(connection):
+    """the user id of the process at the other end of a unix socket,
+    or None where the kernel cannot tell"""
+    if hasattr(socket, 'SO_PEERCRED'):
+        return unpack('3i', connection.getsockopt(SOL_SOCKET, socket.SO_PEERCRED,
+            calcsize('3i')))[1]
+
+class Handler(BaseRequestHandler):
+    """Run a manpager invocation received through the connection in the current process."""
+
+    def handle(self):
+        if peer_uid(self.request) not in (None, getuid()):
+            return
+        data, fds, flags, address = recv_fds(self.request, 1 << 16, 3)
+        while not data.endswith(b'\n'):
+            chunk = self.request.recv(1 << 16)
+            if not chunk:
+                return
+            data += chunk
+        request = loads(data.decode())
+        for fd, standard in zip(fds, range(3)):
+            dup2(fd, standard)
+            close(fd)
+        try:
+            environ.clear()
+            environ.update(request['env'])
+            sys.dont_write_bytecode = bool(environ.get('PYTHONDONTWRITEBYTECODE'))
+            sys.pycache_prefix = environ.get('PYTHONPYCACHEPREFIX') or None
+            chdir(request['cwd'])
+            sys.path[0] = request['cwd']
+            sys.path[1:1] = map(path.abspath,
+                    filter(None, environ.get('PYTHONPATH', '').split(':')))
+            from .options import parse
+            args = parse(request['argv'])
+            if args.cache_command:
+                from .cache import manage
+                status = int(bool(manage(args)))
+            else:
+                from .timings import instrumented
+                with instrumented(args):
+                    from .generate import main
+                    status = int(main(args))
+        except SystemExit as exit:
+            status = exit_status(exit.code)
+        except Exception:
+            print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        self.request.sendall(str(status).encode())
+
+class Server(ForkingMixIn, UnixStreamServer):
+    """A server forking for each request."""
+
+def serve(address):
+    """Serve requests on a unix socket at the given path until interrupted or terminated."""
+    if path.exists(address):
+        unlink(address)
+    signal(SIGTERM, default_int_handler)
+    with Server(address, Handler) as server:
+        chmod(address, 0o600)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            unlink(address)
@@ -0,0 +1,5 @@
+"""
+tests of the manpager
+
+Run them from the top of the repository with "python -m unittest".
+"""
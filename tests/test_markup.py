@@ -0,0 +1,102 @@
+"""
+equivalence of the sanitizer with its original implementation
+
+The Sanitizer used to dispatch each match by trying its groups in order and escaped
+characters through the same expression. Its current implementation has to produce the
+very same text, byte for byte, for the manual pages to stay the same.
+"""
+
+from argparse import ArgumentParser
+from collections import OrderedDict
+from importlib import import_module
+from random import Random
+from re import compile, MULTILINE
+from unittest import TestCase
+from manpager.markup import MultiRegexReplacer, Sanitizer
+
+class OriginalMultiRegexReplacer(object):
+    """the MultiRegexReplacer as it was before dispatching by group name"""
+
+    def __init__(self, replaces):
+        expressions, self.replacements = zip(*replaces.items())
+        self.expression = compile('|'.join(map('({})'.format, expressions)), MULTILINE)
+
+    def replace(self, match):
+        for group, replacement in zip(match.groups(), self.replacements):
+            if group:
+                try:
+                    return replacement(group)
+                except TypeError:
+                    return replacement
+
+    def __call__(self, text):
+        return self.expression.sub(self.replace, text)
+
+class OriginalSanitizer(OriginalMultiRegexReplacer):
+    """the Sanitizer as it was before escaping characters separately"""
+
+    def __init__(self, paragraph=".PP"):
+        paragraph = '\n' + paragraph + '\n'
+        super().__init__(OrderedDict((
+            ('-', '\\-'),
+            ('\n\n+', paragraph),
+            ('^\\s+|\\s+$', ''),
+            ('\\s\\s+', ' '))))
+
+# modules whose docstrings serve as realistic help texts
+documented = ('argparse', 'calendar', 'http.server', 'json', 'os', 're', 'textwrap', 'zipfile')
+
+def documentation():
+    """Generate the docstrings of some modules and everything defined in them."""
+    seen = set()
+    for module in map(import_module, documented):
+        for value in [module] + list(vars(module).values()):
+            text = getattr(value, '__doc__', None)
+            if isinstance(text, str) and text not in seen:
+                seen.add(text)
+                yield text
+
+def scrambled(count, seed=0):
+    """Generate random texts made up mostly of what the sanitizer replaces."""
+    random = Random(seed)
+    alphabet = ['-', '--', ' ', '  ', '\t', '\n', '\n\n', '\n\n\n', ' \n ', '\r', '\x0b',
+            '\x0c', '\xa0', ' ', 'a', 'word', '\\', '.PP', '%(default)s', 'ä']
+    for index in range(count):
+        yield ''.join(random.choice(alphabet) for piece in range(random.randrange(40)))
+
+class SanitizerTest(TestCase):
+
+    def assertEquivalent(self, paragraph, texts):
+        current, original = Sanitizer(paragraph), OriginalSanitizer(paragraph)
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(current(text).encode(), original(text).encode())
+
+    def test_documentation(self):
+        for paragraph in ('.PP', '.IP'):
+            self.assertEquivalent(paragraph, documentation())
+
+    def test_scrambled(self):
+        for paragraph in ('.PP', '.IP'):
+            self.assertEquivalent(paragraph, scrambled(5000))
+
+    def test_pages(self):
+        parser = ArgumentParser(prog='sample', description="""
+            A description, spanning - as help texts tend to - several lines.
+
+            Another paragraph,\tindented    and spaced out.\n\n\n""")
+        parser.add_argument('--option', help="  some -- help  \n\n  text  ")
+        texts = [parser.description] + [action.help for action in parser._actions]
+        self.assertEquivalent('.PP', texts)
+        self.assertEquivalent('.IP', texts)
+
+class MultiRegexReplacerTest(TestCase):
+
+    def test_replacements(self):
+        replaces = OrderedDict((('a+', str.upper), ('b', 'c'), ('x(?:y)', 'z'), ('^ ', '')))
+        current, original = MultiRegexReplacer(replaces), OriginalMultiRegexReplacer(replaces)
+        random = Random(1)
+        for index in range(2000):
+            text = ''.join(random.choice('aabxy \n') for piece in range(random.randrange(30)))
+            with self.subTest(text=text):
+                self.assertEqual(current(text), original(text))
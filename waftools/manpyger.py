@@ -42,6 +42,8 @@ named "__main__.py" is considered a match as well as every file that contains th
 string "__name__ == '__main__'" specified with either double or single quotes. The
 latter string identifying executable modules may be changed by assigning a pattern
 object (as created by re.compile) to the attribute "main_indicator" of this module.
+Which files matched is remembered between builds, so that only files that changed
+since are searched again.
 
 The short program description used in the manual page and by apropos can be overwritten
 with the "short" parameter. Sections can be added using the "extra" parameter. Using an
@@ -53,6 +55,21 @@ OrderedDict for the latter is highly recommended to keep them from mixing up the
                 ('BUGS', "The program should perhaps do something"))))
 
 
+Starters are shell scripts executing "python -m" by default. Setting the parameter
+"launcher" to "python" instead installs python scripts with an absolute shebang, which
+run the module with sys.path pinned to the one found on configuration, saving the shell
+and the search through the default path on every start. The parameter "isolated" adds
+python's -I flag to them and "site" set False its -S flag, so that neither the environment
+nor the site module can slow them down. The bytecode of the modules started should be
+compiled on installation, as the "py" feature does unless waf is told otherwise.
+
+    bld(features="py entrypynt", root="package", launcher="python", isolated=True)
+
+To see how long the starters installed take to start, pass "--measure" to waf install.
+Each of them is then run with "--help" a few times and the fastest run is reported. Starters
+failing are reported with their error instead, as happens with "--destdir" when the packages
+they import are not installed where python looks for them.
+
 Both features can be conveniently combined to install an executable module in one line.
 
     bld(feature="py entrypynt", root=bld.path.ant_glob("package_*"))
@@ -62,40 +79,162 @@ Both features can be conveniently combined to install an executable module in on
 
 When generating a manual page, the tool tries to find all dependencies
 by recursively scanning the given modules source for import statements.
-The regular expression used to find these can be changed by assigning a
-new pattern object (created by re.compile) to the attribute "import_statement"
-of this module. It should be compiled with the MULTILINE flag and assign
-the name of the module imported to a group named "module". By default,
-instances of "from module import anything" and "import module" are found.
+Relative imports as well as absolute ones that can be found below the
+path the modules are installed from are followed. The imports found in
+each file are remembered between builds, so that unchanged files need
+not be parsed again.
+
+You may set the attribute "scan_imports" of this module to False to turn off recursive scanning.
+
+
+Each manual page is generated by a separate python process by default. Setting the "batch"
+parameter instead documents all starters of a task generator in one process, saving
+interpreter startup and imports shared between the modules, at the cost of regenerating
+all of these pages whenever one of them changes.
+
+    bld(features="py entrypynt", root="package", batch=True)
+
+Pages for subcommands of programs using subparsers can be generated from the same run,
+and are summarized on the page of the program itself. As their names must be known in
+advance, they are listed with the parameter "subcommands", either for all starters or
+mapping each module to its own ones. Names of nested subcommands are joined by dashes.
+
+    bld(features="entrypynt", starter="admin", subcommands="user user-add group")
+    Install the pages admin-user.1, admin-user-add.1 and admin-group.1 next to admin.1.
+
+Manual pages are compressed with gzip by default. The parameter "compression" selects
+"xz", "bzip2" or "none" instead, "compression_level" the level to use. Compression happens
+within the build process and yields the same bytes for the same page on every build.
+
+    bld(features="entrypynt", starter="tool", compression="xz", compression_level=9)
+
+The same pages can be rendered to other formats as well, listed in the parameter "formats"
+as "html", "md" for Markdown or "json". These come from the same manpager run as the manual
+pages, named alike with the suffix of their format, and are installed uncompressed, HTML to
+HTMLDIR and the others to DOCDIR.
+
+    bld(features="entrypynt", starter="tool", formats="html md")
+
+To spare man from formatting the pages each time they are shown, the parameter "cat" set True
+preformats them at build time for the terminal width given by "cat_width", 80 by default.
+These cat pages are compressed like the manual pages and installed to the cat1 directory
+next to them. They are formatted with mandoc, or groff when it is missing, as found on
+configuration. When there is neither, no cat pages are made.
 
-You may set it to an invalid pattern, like "$^", to turn off recursive scanning.
+    bld(features="entrypynt", starter="tool", cat=True, cat_width=100)
+
+The NAME sections of all pages are gathered into an index in the whatis format, one line per
+page, and a JSON variant of it, listing the name and description of each page. These are
+installed to MANDIR, named after the application or "whatis" when it has none, so that
+neither whatis nor apropos need to parse the pages to find them. The parameter "index" set
+False leaves the pages of a task generator out.
+
+The manpager reuses pages it generated before from its cache when neither the sources
+of a module, nor the distributions it imports, nor the options changed. When the environment
+variable MANPAGER_CACHE is set during the build, it is passed on to locate the cache, which
+lets builds from clean checkouts share their pages.
+
+Pages are dated by the day the sources of their module were last modified, so that they only
+change when these do. Set the environment variable SOURCE_DATE_EPOCH during the build, which
+is passed on as well, or the parameter "date" as YYYY-MM-DD to fix the date instead. When a
+page is regenerated with the same content, its file keeps its modification time, so that
+neither compressing nor installing it is repeated.
+
+    bld(features="entrypynt", starter="tool", date="2015-06-01")
+
+The parameters "timeout", in seconds, and "max_memory", in bytes or suffixed by K, M or G,
+bound the resources generating each page may take, so that a module connecting somewhere,
+sleeping or allocating plenty of memory when executed fails quickly instead of stalling the
+build. The error then names the phase the generation was in.
+
+    bld(features="entrypynt", starter="tool", timeout=10, max_memory="1G")
+
+The parameter "static" lets the manpager reconstruct the argument parser from the source
+instead of executing the module, which falls back to execution where this is not possible.
+
+Generating pages becomes considerably faster when a manpager worker is kept running with
+"manpager --serve". When one is reachable at its default socket, it is used instead of
+starting a new python process for each page. A worker must run the same python version
+and see the same manpager installation the project is configured with.
+
+To find out which modules slow down the build, pass "--manpager-timings" to waf. Every
+page then records the time spent in each phase of its generation, and the build ends with
+a report listing the slowest pages, written in full to manpager-timings.json in the build
+directory. Only pages generated during the build are measured, so combine it with clean.
+
+    waf clean build --manpager-timings
+
+The bytecode python compiles while generating manual pages is kept in the directory
+"pycache" in the build tree instead of next to the sources, which stay untouched. It
+is reused by all pages and later builds, so each source is only compiled once.
 """
 
-from waflib.Task import Task
+from waflib.Task import Task, compile_fun
 from waflib.TaskGen import feature, before_method, after_method, taskgen_method
-from waflib.Utils import O755, subst_vars, to_list
+from waflib.Utils import O755, subst_vars, to_list, h_file
 from waflib.Context import g_module, APPNAME
 from waflib.Node import Node
+from waflib import Logs, Options
 from waflib.Tools.python import feature_py
-from re import compile, MULTILINE
+from re import compile, UNICODE
 from itertools import chain
 from operator import methodcaller
+from shlex import quote, split
+from functools import partial
+from os import environ, getuid, path, stat, fstat, utime
+from mmap import mmap, ACCESS_READ
+from concurrent.futures import ThreadPoolExecutor
+from socket import socket, AF_UNIX, SOL_SOCKET, send_fds
+import socket as sockets
+from struct import calcsize, unpack
+from tempfile import gettempdir, TemporaryFile
+from json import dumps, loads
+from ast import parse, walk, literal_eval, Import, ImportFrom
+from subprocess import run as execute, DEVNULL, PIPE
+from time import perf_counter
+from gzip import compress as gzip
+from lzma import compress as xz
+from bz2 import compress as bzip2
 
 
 def options(ctx):
     ctx.load('python gnu_dirs')
+    ctx.add_option('--manpager-timings', action='store_true', default=False,
+            help="measure the time generating each manual page takes")
+    ctx.add_option('--measure', action='store_true', default=False, dest='measure_starters',
+            help="report the time each starter installed takes to start")
 
 def configure(ctx):
     ctx.load('python gnu_dirs')
     ctx.check_python_module('manpager')
+    ctx.env.PYTHONSYSPATH = literal_eval(ctx.cmd_and_log(ctx.env.PYTHON + ['-I', '-c',
+        'import sys; print([entry for entry in sys.path if entry])']).strip())
+    # The default path of python, unaffected by the environment, for python launchers.
+    ctx.find_program('mandoc', var='MANDOC', mandatory=False)
+    ctx.find_program('groff', var='GROFF', mandatory=False)
+    # formatters for preformatted cat pages, of which mandoc is preferred for its speed
+
+launcher = """#!{python}{flags}
+import sys
+sys.path[:] = {path!r}
+from runpy import run_module
+run_module({module!r}, run_name='__main__', alter_sys=True)
+"""
+# python starter, running a module like "python -m" does, without searching the whole path
 
 class entrypynt(Task):
-    vars = ["PYTHON", "MODULE"]
+    vars = ["PYTHON", "MODULE", "LAUNCHER", "LAUNCHERFLAGS", "LAUNCHERPATH"]
 
     def run(self):
         starter = self.outputs[0]
-        starter.write("#!/bin/sh\n" +
-                subst_vars("exec ${PYTHON} -m ${MODULE} $@", self.env))
+        env = self.env
+        if env.LAUNCHER == "python":
+            starter.write(launcher.format(python=env.PYTHON[0],
+                flags=env.LAUNCHERFLAGS and " " + env.LAUNCHERFLAGS,
+                path=env.LAUNCHERPATH, module=env.MODULE))
+        else:
+            starter.write("#!/bin/sh\n" +
+                    subst_vars("exec ${PYTHON} -m ${MODULE} $@", env))
         starter.chmod(O755)
 
 def find_py(location, module, entry="__init__"):
@@ -107,30 +246,152 @@ def find_py(location, module, entry="__init__"):
     else:
         return location.find_node(module + ".py")
 
-import_statement = compile("^(import|(?P<from>from)) (?P<module>\..+)(?(from) import .+)$",
-        MULTILINE)
+scan_imports = True
+
+IMPORT_INDEX = "manpyger imports"
+# key of the index in raw_deps, which is stored between builds
+
+def imports(bld, node):
+    """List the imports of a python source as tuples of level, module and names.
+
+    The result is stored in the build context, keyed by the signature of
+    the node, so that the source is only parsed again when it changed."""
+    index = bld.raw_deps.setdefault(IMPORT_INDEX, {})
+    key = node.abspath()
+    signature = node.get_bld_sig()
+    known = index.get(key)
+    if known and known[0] == signature:
+        return known[1]
+    try:
+        tree = parse(node.read('rb'), key)
+    except SyntaxError:
+        tree = None
+    result = [(0, alias.name, ()) for statement in walk(tree) if isinstance(statement, Import)
+                for alias in statement.names] + \
+            [(statement.level, statement.module or "",
+                tuple(alias.name for alias in statement.names))
+                for statement in walk(tree) if isinstance(statement, ImportFrom)] \
+            if tree else []
+    index[key] = signature, result
+    return result
+
+def resolve(location, module, names):
+    """Find the sources of a module and those of the names imported from it,
+    which may be submodules, in a given location. Missing ones are left out."""
+    if module:
+        yield find_py(location, module)
+        base = module + "."
+    else:
+        base = ""
+    for name in names:
+        yield find_py(location, base + name)
+
+def local_imports(bld, location, modules):
+    """find the given modules and their local imports recursively"""
+    unseen = {find_py(location, module, "__main__") for module in modules}
+    seen = set()
+    while unseen:
+        module = unseen.pop()
+        if not module:
+            continue
+        seen.add(module)
+        if not scan_imports:
+            continue
+        for level, name, names in imports(bld, module):
+            if level:
+                package = module.parent
+                for up in range(level - 1):
+                    package = package.parent
+                found = resolve(package, name, names)
+            else:
+                found = resolve(location, name, names)
+            unseen.update(node for node in found if node not in seen)
+    return seen
+
+def worker_address():
+    """the socket a manpager worker started with --serve listens on by default"""
+    return environ.get("MANPAGER_SOCKET") or path.join(
+            environ.get("XDG_RUNTIME_DIR") or gettempdir(),
+            "manpager-{}.sock".format(getuid()))
+
+def peer_uid(connection, address):
+    """the user id of the process at the other end of a unix socket connected to an address,
+    asked from the kernel where possible, as the owner of the socket file otherwise"""
+    if hasattr(sockets, "SO_PEERCRED"):
+        return unpack("3i", connection.getsockopt(SOL_SOCKET, sockets.SO_PEERCRED,
+            calcsize("3i")))[1]
+    return stat(address).st_uid
+
+def consult_worker(task, argv, stdin=0, stdout=1):
+    """Execute a manpager command line for a task in a running worker.
+
+    The standard streams are passed as file descriptors. Returns the exit status or None
+    when no worker could be reached. Workers of other users are not trusted with the
+    streams and environment, as the default socket may be in a shared directory."""
+    client = socket(AF_UNIX)
+    address = worker_address()
+    try:
+        client.connect(address)
+        if peer_uid(client, address) != getuid():
+            Logs.warn("ignoring manpager worker at {} run by another user".format(address))
+            client.close()
+            return None
+    except OSError:
+        client.close()
+        return None
+    with client:
+        env = dict(task.env.env or environ)
+        send_fds(client, [dumps(dict(argv=argv, env=env,
+            cwd=task.get_cwd().abspath())).encode() + b"\n"], [stdin, stdout, 2])
+        return int(b"".join(iter(partial(client.recv, 64), b"")) or 1)
+
+def fingerprints(nodes):
+    """Record the status and content hash of the files of those nodes that exist."""
+    result = {}
+    for node in nodes:
+        try:
+            result[node] = stat(node.abspath()), h_file(node.abspath())
+        except OSError:
+            pass
+    return result
+
+def preserve(fingerprints):
+    """Restore the modification time of each file recorded whose content did not
+    change since, so that installation does not consider it changed either."""
+    for node, (status, digest) in fingerprints.items():
+        try:
+            if h_file(node.abspath()) == digest:
+                utime(node.abspath(), ns=(status.st_atime_ns, status.st_mtime_ns))
+        except OSError:
+            pass
 
 class manpyge(Task):
-    vars = ['env']  # This contains the PYTHONPATH which may cause a whole different module.
-    # It can only be conveniently hashed like this because it contains only this
-    # one element. Would it contain more, the unspecified order in a dictionary
-    # could generate a different hash also when the elements do not change.
+    vars = ['env', 'PYTHON', 'MANPAGERFLAGS', 'MODULE']
+    # env contains the PYTHONPATH which may cause a whole different module.
+    # It can only be conveniently hashed like this because its elements are
+    # always inserted in the same order, so that its representation is stable.
 
-    run_str = "${PYTHON} -Bm manpager ${MANPAGERFLAGS} ${MODULE} > ${TGT}"
+    spawn = compile_fun("${PYTHON} -m manpager ${MANPAGERFLAGS} ${MODULE} > ${TGT[0]}")[0]
+
+    def run(self):
+        """regenerate the outputs, keeping the time stamps of those that did not change"""
+        previous = fingerprints(self.outputs)
+        status = self.document()
+        if not status:
+            preserve(previous)
+        return status
+
+    def document(self):
+        """document the module in a running worker, if any, or a new process"""
+        with open(self.outputs[0].abspath(), 'w') as page:
+            status = consult_worker(self, split(' '.join(self.env.MANPAGERFLAGS))
+                    + [self.env.MODULE], stdout=page.fileno())
+        return self.spawn() if status is None else status
 
     def scan(self):
         """find local imports recursively"""
-        module = find_py(self.generator.install_from, self.env.MODULE, "__main__")
-        unseen = {module}
-        seen = set()
-        while unseen:
-            module = unseen.pop()
-            seen.add(module)
-            for match in import_statement.finditer(module.read()):
-                next = find_py(module.parent, match.group("module")[1:])
-                if next not in seen:
-                    unseen.add(next)
-        return sorted(seen, key=methodcaller('srcpath')), None
+        return sorted(local_imports(self.generator.bld, self.generator.install_from,
+                to_list(self.env.MODULE)), key=methodcaller('srcpath')), None
 
     def keyword(self):
         return "Documenting module"
@@ -138,12 +399,165 @@ class manpyge(Task):
     def __str__(self):
         return self.env.MODULE
 
-class gz(Task):
-    run_str = "gzip -c ${SRC} > ${TGT}"
+class manpyges(manpyge):
+    """document multiple modules in a single manpager run"""
+    vars = ['env', 'PYTHON', 'MANIFEST', 'MANPAGERTIMINGS']
+
+    def document(self):
+        argv = ['-m', '-'] + self.env.MANPAGERTIMINGS
+        with TemporaryFile() as manifest:
+            manifest.write('\n'.join(self.env.MANIFEST).encode())
+            manifest.seek(0)
+            status = consult_worker(self, argv, stdin=manifest.fileno())
+            if status is None:
+                status = self.exec_command(self.env.PYTHON + ['-m', 'manpager'] + argv,
+                        env=self.env.env or None, stdin=manifest)
+        return status
+
+    def __str__(self):
+        return ' '.join(self.env.MODULE)
+
+codecs = {
+        "gzip": (".gz", lambda data, level=9: gzip(data, level, mtime=0)),
+        "xz": (".xz", lambda data, level=6: xz(data, preset=level)),
+        "bzip2": (".bz2", bzip2)}
+# mapping from compression names to the file suffix and a function compressing bytes with an
+# optional level, chosen to produce the same output for the same input on every invocation
+
+formats = {
+        "html": (".html", "${HTMLDIR}"),
+        "md": (".md", "${DOCDIR}"),
+        "json": (".json", "${DOCDIR}")}
+# mapping from the formats the manpager renders pages to besides roff
+# to the suffix of their files and the directory they are installed to
+
+class compress(Task):
+    """compress a manual page within the build process"""
+    vars = ["MANCOMPRESS", "MANCOMPRESSLEVEL"]
+
+    def run(self):
+        level = self.env.MANCOMPRESSLEVEL
+        self.outputs[0].write(codecs[self.env.MANCOMPRESS][1](self.inputs[0].read('rb'),
+            *([level] if level != [] else [])), 'wb')
 
     def keyword(self):
         return "Compressing"
 
+class catman(Task):
+    """preformat a manual page for display on a terminal"""
+    vars = ["MANDOC", "GROFF", "CATWIDTH"]
+
+    def run(self):
+        env = self.env
+        if env.MANDOC:
+            command = env.MANDOC + ["-man", "-Tutf8", "-O", "width={}".format(env.CATWIDTH)]
+        else:
+            command = env.GROFF + ["-man", "-Tutf8", "-P-c",
+                    "-rLL={}n".format(env.CATWIDTH), "-rLT={}n".format(env.CATWIDTH)]
+            # -P-c lets grotty overstrike instead of using escape sequences, like cat pages do.
+        with open(self.outputs[0].abspath(), 'wb') as page:
+            status = self.exec_command(command + [self.inputs[0].abspath()], stdout=page)
+        if status:
+            self.outputs[0].delete()  # rather than leaving it truncated
+        return status
+
+    def keyword(self):
+        return "Preformatting"
+
+roff_escape = compile(r'\\(f[BIRP]|\(..|.)')
+# escapes in roff, of which only a few characters remain in plain text
+roff_characters = {"-": "-", "e": "\\", "\\": "\\", " ": " ", "~": " "}
+
+def name_entry(text):
+    """Extract the name and description from the NAME section of a manual page."""
+    lines = text.split("\n")
+    try:
+        start = lines.index(".SH NAME") + 1
+    except ValueError:
+        return None
+    end = start
+    while end < len(lines) and not lines[end].startswith("."):
+        end += 1
+    name = roff_escape.sub(lambda match: roff_characters.get(match.group(1), ""),
+            " ".join(lines[start:end]))
+    name, _, description = name.partition(" - ")
+    return name.strip(), description.strip()
+
+class whatis(Task):
+    """gather the NAME sections of manual pages into a whatis index and its JSON variant"""
+
+    def run(self):
+        entries = sorted(filter(None, (name_entry(page.read()) for page in self.inputs)))
+        self.outputs[0].write("".join("{} (1) - {}\n".format(name, description)
+            for name, description in entries))
+        self.outputs[1].write(dumps([dict(name=name, section="1", description=description)
+            for name, description in entries], indent=2) + "\n")
+
+    def keyword(self):
+        return "Indexing"
+
+def index(tg):
+    """Get the task indexing all pages of a build, created by the first task generator."""
+    bld = tg.bld
+    if not hasattr(bld, "manpyger_index"):
+        name = getattr(g_module, APPNAME, None)
+        name = name + ".whatis" if name else "whatis"
+        outputs = [bld.bldnode.find_or_declare(name), bld.bldnode.find_or_declare(name + ".json")]
+        bld.manpyger_index = tg.create_task("whatis", tgt = outputs)
+        bld.install_files(subst_vars("${MANDIR}", tg.env), outputs)
+    return bld.manpyger_index
+
+
+TIMINGS_REPORT = "manpager-timings.json"
+# name of the build-wide timings report in the build directory
+
+def measure(bld, report):
+    """Compose the manpager options recording timings to a node,
+    which is remembered to be included in the build-wide report."""
+    if not hasattr(bld, "manpager_timings"):
+        bld.manpager_timings = []
+        bld.add_post_fun(report_timings)
+    bld.manpager_timings.append(report)
+    return ['--timings', '--timings-format', 'json', '--timings-file', quote(report.bldpath())]
+
+def report_timings(bld):
+    """Gather the timings of all pages into one report, listing the slowest pages."""
+    pages = []
+    for report in bld.manpager_timings:
+        if path.exists(report.abspath()):
+            pages.extend(loads(report.read())['pages'])
+    for page in pages:
+        page['wall'] = sum(phase['wall'] for phase in page['phases'].values())
+    pages.sort(key=lambda page: page['wall'], reverse=True)
+    bld.bldnode.make_node(TIMINGS_REPORT).write(dumps(dict(pages=pages), indent=2))
+    for page in pages[:10]:
+        Logs.info("{:8.3f}s {} ({})".format(page['wall'], page['module'], ", ".join(
+            "{} {:.3f}s".format(name, phase['wall'])
+            for name, phase in page['phases'].items())))
+
+
+def measure_starters(bld):
+    """Report how long each starter installed takes to show its help."""
+    if bld.cmd != "install":
+        return
+    destdir = Options.options.destdir
+    for starter in bld.manpyger_starters:
+        executable = path.join(destdir, starter.lstrip("/")) if destdir else starter
+        times = []
+        for attempt in range(5):
+            start = perf_counter()
+            process = execute([executable, "--help"], stdout=DEVNULL, stderr=PIPE)
+            times.append(perf_counter() - start)
+            if process.returncode:
+                errors = process.stderr.decode(errors="replace").strip().splitlines()
+                Logs.warn("{} failed with status {}{}".format(starter,
+                    process.returncode, ": " + errors[-1] if errors else ""))
+                break
+        else:
+            Logs.info("{:8.1f}ms {}".format(min(times) * 1000, starter))
+
+PYCACHE = "pycache"
+# directory in the build tree the bytecode compiled while generating manual pages is kept in
 
 feature("entrypynt")(feature_py)
 # This makes sure install_from is either None or a Node which generate_python_starter relies upon.
@@ -166,18 +580,63 @@ def compose_environment(self):
             flag("-s", "'{}'".format(appname))
         for title, content in getattr(self, 'extra', {}).items():
             flag("-e", "'{} {}'".format(title.upper(), content))
+        if getattr(self, 'static', False):
+            flag("--static")
+        date = getattr(self, 'date', None)
+        if date:
+            flag("--date", date)
+        timeout = getattr(self, 'timeout', None)
+        if timeout:
+            flag("--timeout", str(timeout))
+        max_memory = getattr(self, 'max_memory', None)
+        if max_memory:
+            flag("--max-memory", str(max_memory))
+        env.MANCOMPRESS = getattr(self, 'compression', "gzip")
+        if env.MANCOMPRESS not in codecs and env.MANCOMPRESS != "none":
+            self.bld.fatal("unknown compression {} for manual pages".format(env.MANCOMPRESS))
+        env.MANFORMATS = to_list(getattr(self, 'formats', []))
+        for format in env.MANFORMATS:
+            if format not in formats:
+                self.bld.fatal("unknown format {} for manual pages".format(format))
+        level = getattr(self, 'compression_level', None)
+        if level is not None:
+            env.MANCOMPRESSLEVEL = level
+        env.MANCAT = bool(getattr(self, 'cat', False))
+        if env.MANCAT and not (env.MANDOC or env.GROFF):
+            Logs.warn("neither mandoc nor groff found, not preformatting manual pages")
+            env.MANCAT = False
+        env.CATWIDTH = getattr(self, 'cat_width', 80)
+        env.LAUNCHER = getattr(self, 'launcher', "shell")
+        if env.LAUNCHER not in ("shell", "python"):
+            self.bld.fatal("unknown launcher {} for starters".format(env.LAUNCHER))
+        flags = ("I" if getattr(self, 'isolated', False) else "") + \
+                ("" if getattr(self, 'site', True) else "S")
+        env.LAUNCHERFLAGS = flags and "-" + flags
 
         if self.install_from:
             path = self.install_from
         else:
             path = self.install_from = self.path
-        env.env = {"PYTHONPATH": path.bldpath() + ":" + path.srcpath() + ":"}
+        env.env = {"PYTHONPATH": path.bldpath() + ":" + path.srcpath() + ":",
+                "PYTHONPYCACHEPREFIX": self.bld.bldnode.make_node(PYCACHE).abspath()}
+        for variable in ("MANPAGER_CACHE", "SOURCE_DATE_EPOCH"):
+            if variable in environ:
+                env.env[variable] = environ[variable]
 
 @feature("entrypynt")
 @after_method("compose_environment")
 def generate_python_starter(self):
     env = self.env
+    if env.LAUNCHER == "python" and not env.LAUNCHERPATH:
+        env.LAUNCHERPATH = list(dict.fromkeys(
+            ([env.PYTHONDIR] if env.PYTHONDIR else []) + env.PYTHONSYSPATH))
     modules = to_list(getattr(self, "starter", []))
+    batch = getattr(getattr(self, "parent", self), "batch", False)
+    if batch:
+        batchenv = env.derive()
+        manpages = []
+    subcommands = getattr(getattr(self, "parent", self), "subcommands", {})
+    timings = getattr(Options.options, "manpager_timings", False)
     for module, target in zip(modules, chain(self.target, map(self.install_from.find_or_declare,
         (module.replace(".", "-") for module in modules[len(self.target):])))):
         modenv = env.derive()
@@ -187,12 +646,69 @@ def generate_python_starter(self):
             self.create_task(*args, **kwargs).env = modenv
         starter = target.change_ext('.sh')
         create_task('entrypynt', tgt = starter)
-        self.bld.install_as(subst_vars("${BINDIR}/", env) + target.name, starter, chmod=O755)
+        installed = subst_vars("${BINDIR}/", env) + target.name
+        self.bld.install_as(installed, starter, chmod=O755)
+        if Options.options.measure_starters:
+            if not hasattr(self.bld, "manpyger_starters"):
+                self.bld.manpyger_starters = []
+                self.bld.add_post_fun(measure_starters)
+            self.bld.manpyger_starters.append(installed)
         manpage = target.change_ext('.1')
-        create_task('manpyge', tgt = manpage)
-        compressed = target.change_ext('.1.gz')
-        create_task('gz', src = manpage, tgt = compressed)
-        self.bld.install_files(subst_vars("${MANDIR}/man1", env), compressed)
+        pages = [manpage] + [target.parent.find_or_declare(target.name + "-" + name + ".1")
+                for name in to_list(subcommands.get(module, ()) if isinstance(subcommands, dict)
+                    else subcommands)]
+        if len(pages) > 1:
+            # The main page is written to the output directory as well as to the standard
+            # output, which is redirected to the same file. As the manpager reopens it after
+            # the redirection, and nothing is printed, its content is not affected by this.
+            modenv.append_value("MANPAGERFLAGS",
+                    ('--subcommands', '-o', quote(manpage.parent.bldpath())))
+        documents = [(page.change_ext(formats[format][0]), formats[format][1])
+                for format in env.MANFORMATS for page in pages]
+        if documents:
+            # These need an output directory as well, with the same effect on the main page.
+            modenv.append_value("MANPAGERFLAGS", ('--format', ','.join(['roff'] +
+                env.MANFORMATS)) + (() if len(pages) > 1 else
+                    ('-o', quote(manpage.parent.bldpath()))))
+        outputs = pages + [document for document, directory in documents]
+        if timings and not batch:
+            report = target.change_ext('.timings.json')
+            modenv.append_value("MANPAGERFLAGS", measure(self.bld, report))
+        if batch:
+            batchenv.append_value("MODULE", [module])
+            batchenv.append_value("MANIFEST", [' '.join(modenv.MANPAGERFLAGS +
+                    ['-o', quote(manpage.parent.bldpath()), module])])
+            manpages.extend(outputs)
+        else:
+            if timings:
+                outputs.append(report)
+            create_task('manpyge', tgt = outputs)
+        if getattr(getattr(self, "parent", self), "index", True):
+            index(self).inputs.extend(pages)
+        suffix = codecs[env.MANCOMPRESS][0] if env.MANCOMPRESS != "none" else ""
+        for page in pages:
+            if env.MANCAT:
+                formatted = page.change_ext('.cat')
+                create_task('catman', src = page, tgt = formatted)
+                if suffix:
+                    compressed = formatted.change_ext('.cat' + suffix)
+                    create_task('compress', src = formatted, tgt = compressed)
+                    formatted = compressed
+                self.bld.install_as(subst_vars("${MANDIR}/cat1/", env)
+                        + page.name + suffix, formatted)
+            if suffix:
+                compressed = page.change_ext('.1' + suffix)
+                create_task('compress', src = page, tgt = compressed)
+                page = compressed
+            self.bld.install_files(subst_vars("${MANDIR}/man1", env), page)
+        for document, directory in documents:
+            self.bld.install_files(subst_vars(directory, env), document)
+    if batch and manpages:
+        if timings:
+            report = manpages[0].change_ext('.timings.json')
+            batchenv.MANPAGERTIMINGS = measure(self.bld, report)
+            manpages.append(report)
+        self.create_task('manpyges', tgt = manpages).env = batchenv
 
 
 @taskgen_method
@@ -228,6 +744,46 @@ def pop(lst, start, count):
 
 main_indicator = compile('__name__ == (?P<quote>["\'])__main__(?P=quote)')
 
+MAIN_INDEX = "manpyger mains "
+# prefix of the keys in raw_deps, which is stored between builds, completed by the root path
+
+mmap_threshold = 1 << 16
+# size in bytes from which on files are mapped into memory instead of read for searching
+
+def search(pattern, filename):
+    """Tell whether a pattern occurs in a file. Large files are mapped into
+    memory, so that only the part up to the first match is actually read."""
+    with open(filename, 'rb') as file:
+        if fstat(file.fileno()).st_size > mmap_threshold:
+            with mmap(file.fileno(), 0, access=ACCESS_READ) as content:
+                return bool(pattern.search(content))
+        return bool(pattern.search(file.read()))
+
+def executables(bld, root):
+    """Find the executable modules below a root.
+
+    Results from previous builds are reused for files whose modification time
+    and size did not change. All other files are searched on a thread pool."""
+    pattern = compile(main_indicator.pattern.encode(), main_indicator.flags & ~UNICODE)
+    key = MAIN_INDEX + root.abspath()
+    previous = bld.raw_deps.get(key, {})
+    nodes = root.ant_glob("**/*.py")
+    stamps = {}
+    for node in nodes:
+        if node.name != "__main__.py":
+            filename = node.abspath()
+            status = stat(filename)
+            stamps[filename] = status.st_mtime_ns, status.st_size, main_indicator.pattern
+    index = {filename: previous[filename] for filename, stamp in stamps.items()
+            if previous.get(filename, (None, ))[0] == stamp}
+    missing = [filename for filename in stamps if filename not in index]
+    if missing:
+        with ThreadPoolExecutor() as pool:
+            for filename, found in zip(missing, pool.map(partial(search, pattern), missing)):
+                index[filename] = stamps[filename], found
+    bld.raw_deps[key] = index
+    return [node for node in nodes if node.name == "__main__.py" or index[node.abspath()][1]]
+
 @feature("entrypynt")
 @after_method("feature_py")
 @before_method("generate_python_starter")
@@ -240,15 +796,10 @@ def compose_starters(self):
             self.target = pop(parent.target,
                     len(getattr(parent, "starter", ())), len(mains))
         elif not hasattr(self.parent, 'starter'):
-            root = self.root
-            base = root.parent
-            def starter_path(node):
-                if node.name == "__main__.py":
-                    return node.parent.path_from(base)
-                elif main_indicator.search(node.read()):
-                    return node.path_from(base)[:-3]
-            self.starter = [starter.replace("/", ".") for starter in
-                    map(starter_path, root.ant_glob("**/*.py")) if starter]
+            base = self.root.parent
+            self.starter = [(node.parent.path_from(base) if node.name == "__main__.py"
+                else node.path_from(base)[:-3]).replace("/", ".")
+                for node in executables(self.bld, self.root)]
     else:
         self.target = self.to_nodes(getattr(self, "target", ()),
                 self.install_from, "find_or_declare")